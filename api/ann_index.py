@@ -0,0 +1,376 @@
+import json
+import math
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from similarity import top_k_indices
+
+
+class IVFIndex:
+    """Persistent inverted-file (IVF) index for approximate cosine search on CPU.
+
+    Vectors are clustered with spherical k-means into ``nlist`` lists; a
+    search only scores the vectors in the ``nprobe`` lists whose centroids
+    are closest to the query. Until ``train_min`` vectors are indexed the
+    index is searched exhaustively, and it is retrained once it has grown
+    ``retrain_factor`` times past the size it was trained on.
+
+    Items are keyed by string and carry a small JSON payload (e.g. post
+    metadata), so results can be used without another lookup. Inserts and
+    deletes are incremental, and so are saves (see ``save``). ``version`` is
+    bumped on every change so callers can tell when results may differ.
+    ``model_name`` ties the saved index to whatever produced its vectors, so
+    a different encoder never mixes its vectors with the stored ones.
+    """
+
+    MAX_DELTAS = 32
+    DELTA_FRACTION = 0.25
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        nlist: int = 0,
+        nprobe: int = 8,
+        train_min: int = 1000,
+        retrain_factor: float = 4.0,
+        model_name: str = "",
+    ):
+        self.dim = dim
+        self.model_name = model_name
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_min = train_min
+        self.retrain_factor = retrain_factor
+        self.trained_size = 0
+        self.version = 0
+
+        self._vectors = np.zeros((0, dim or 0), dtype=np.float16)
+        self._count = 0
+        self._keys: List[Optional[str]] = []
+        self._payloads: List[Optional[Dict[str, Any]]] = []
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._rows: Dict[str, int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._dirty = False
+        self._added: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._full_save = False
+        self._delta_files = 0
+        self._delta_rows = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def payload(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored payload for a key, None if it isn't indexed"""
+        row = self._rows.get(key)
+        return None if row is None else self._payloads[row]
+
+    def _append_rows(self, vectors: np.ndarray) -> np.ndarray:
+        """Append vectors to the storage matrix, growing it geometrically (lock held)"""
+        needed = self._count + len(vectors)
+        if needed > len(self._vectors):
+            grown = np.zeros((max(needed, 2 * len(self._vectors), 64), self.dim), dtype=np.float16)
+            grown[:self._count] = self._vectors[:self._count]
+            self._vectors = grown
+
+            assign = np.full(len(grown), -1, dtype=np.int32)
+            assign[:self._count] = self._assign[:self._count]
+            self._assign = assign
+
+        rows = np.arange(self._count, needed)
+        self._vectors[rows] = vectors
+        self._count = needed
+        return rows
+
+    def add(self, keys: List[str], vectors: np.ndarray, payloads: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Insert (or replace) normalized vectors under the given keys"""
+        if not keys:
+            return
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        payloads = payloads or [None] * len(keys)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._vectors = np.zeros((0, self.dim), dtype=np.float16)
+
+            self.remove(keys)
+            self._added.update(keys)
+            rows = self._append_rows(vectors)
+            for key, payload, row in zip(keys, payloads, rows):
+                self._keys.append(key)
+                self._payloads.append(payload)
+                self._rows[key] = int(row)
+
+            if self._centroids is not None:
+                lists = np.argmax(vectors @ self._centroids.T, axis=1)
+                self._assign[rows] = lists
+                for row, list_id in zip(rows, lists):
+                    self._lists[list_id].append(int(row))
+
+            self._dirty = True
+            self.version += 1
+            if len(self) >= self.train_min and (
+                self._centroids is None or len(self) >= self.trained_size * self.retrain_factor
+            ):
+                self.train()
+
+    def remove(self, keys: List[str]) -> int:
+        """Delete keys from the index and return how many were present"""
+        removed = 0
+        with self._lock:
+            for key in keys:
+                row = self._rows.pop(key, None)
+                if row is None:
+                    continue
+                self._keys[row] = None
+                self._payloads[row] = None
+                self._added.discard(key)
+                self._removed.add(key)
+                list_id = self._assign[row]
+                if list_id >= 0:
+                    self._lists[list_id].remove(row)
+                    self._assign[row] = -1
+                removed += 1
+            if removed:
+                self._dirty = True
+                self.version += 1
+        return removed
+
+    def train(self, iterations: int = 10, seed: int = 0) -> None:
+        """Cluster the live vectors with spherical k-means and rebuild the inverted lists"""
+        with self._lock:
+            rows = np.array(sorted(self._rows.values()), dtype=np.int64)
+            vectors = self._vectors[rows].astype(np.float32)
+            nlist = self.nlist or max(1, int(math.sqrt(len(rows))))
+            nlist = min(nlist, len(rows))
+
+            rng = np.random.default_rng(seed)
+            centroids = vectors[rng.choice(len(vectors), nlist, replace=False)]
+            for _ in range(iterations):
+                assign = np.argmax(vectors @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assign, vectors)
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                # Empty clusters keep their previous centroid
+                centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+            assign = np.argmax(vectors @ centroids.T, axis=1)
+            self._centroids = centroids.astype(np.float32)
+            self._assign[:] = -1
+            self._assign[rows] = assign
+            self._lists = [[] for _ in range(nlist)]
+            for row, list_id in zip(rows, assign):
+                self._lists[list_id].append(int(row))
+
+            self.trained_size = len(rows)
+            self._dirty = True
+            self._full_save = True
+            print(f"Trained IVF index: {len(rows)} vectors in {nlist} lists")
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Tuple[str, float, Optional[Dict[str, Any]]]]:
+        """Approximate top-k ``(key, cosine, payload)`` for a normalized query, best first.
+
+        ``predicate`` filters on the payload before the top-k is taken.
+        """
+        query = np.asarray(query, dtype=np.float32).ravel()
+        with self._lock:
+            if not self._rows:
+                return []
+
+            if self._centroids is None:
+                rows = np.array(list(self._rows.values()), dtype=np.int64)
+            else:
+                probes = top_k_indices(self._centroids @ query, self.nprobe)[0]
+                rows = np.array([row for list_id in probes for row in self._lists[list_id]], dtype=np.int64)
+
+            if predicate is not None:
+                rows = rows[[predicate(self._payloads[row] or {}) for row in rows]] if len(rows) else rows
+            if not len(rows):
+                return []
+
+            scores = self._vectors[rows].astype(np.float32) @ query
+            best = top_k_indices(scores, k)[0]
+            return [(self._keys[rows[i]], float(scores[i]), self._payloads[rows[i]]) for i in best]
+
+    def _restore_rows(self, keys: List[str], vectors: np.ndarray, assign: np.ndarray, payloads: List[Any]) -> None:
+        """Append saved rows with their saved list assignments (lock held)"""
+        if not keys:
+            return
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._vectors = np.zeros((0, self.dim), dtype=np.float16)
+
+        rows = self._append_rows(vectors)
+        for key, payload, row, list_id in zip(keys, payloads, rows, assign):
+            self._keys.append(key)
+            self._payloads.append(payload)
+            self._rows[key] = int(row)
+            self._assign[row] = list_id
+            if self._centroids is not None and list_id >= 0:
+                self._lists[list_id].append(int(row))
+
+    @staticmethod
+    def _delta_paths(path: str) -> List[str]:
+        """Delta files written since ``path`` was last rewritten, oldest first"""
+        directory, name = os.path.split(path)
+        pattern = re.compile(re.escape(name) + r"\.delta(\d+)\.npz$")
+        deltas = []
+        for entry in os.listdir(directory or "."):
+            match = pattern.match(entry)
+            if match:
+                deltas.append((int(match.group(1)), os.path.join(directory, entry)))
+        return [delta_path for _, delta_path in sorted(deltas)]
+
+    def _save_full(self, path: str) -> None:
+        """Rewrite the whole index without deleted rows and drop the deltas it supersedes (lock held)"""
+        keys = list(self._rows)
+        rows = np.array([self._rows[key] for key in keys], dtype=np.int64)
+        arrays = {
+            "model_name": np.array(self.model_name),
+            "dim": np.array(self.dim or 0),
+            "trained_size": np.array(self.trained_size),
+            "version": np.array(self.version),
+            "keys": np.array(keys, dtype=str),
+            "vectors": self._vectors[rows] if len(rows) else np.zeros((0, self.dim or 0), dtype=np.float16),
+            "assign": self._assign[rows] if len(rows) else np.zeros(0, dtype=np.int32),
+            "payloads": encode_payloads([self._payloads[row] for row in rows]),
+        }
+        if self._centroids is not None:
+            arrays["centroids"] = self._centroids
+
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+        for delta_path in self._delta_paths(path):
+            os.remove(delta_path)
+        self._delta_files = 0
+        self._delta_rows = 0
+        self._full_save = False
+
+    def _save_delta(self, path: str) -> None:
+        """Write only the rows added and keys removed since the last save (lock held)"""
+        keys = [key for key in self._added if key in self._rows]
+        rows = np.array([self._rows[key] for key in keys], dtype=np.int64)
+        arrays = {
+            "version": np.array(self.version),
+            "removed": np.array(sorted(self._removed), dtype=str),
+            "keys": np.array(keys, dtype=str),
+            "vectors": self._vectors[rows] if len(rows) else np.zeros((0, self.dim or 0), dtype=np.float16),
+            "assign": self._assign[rows] if len(rows) else np.zeros(0, dtype=np.int32),
+            "payloads": encode_payloads([self._payloads[row] for row in rows]),
+        }
+
+        delta_path = f"{path}.delta{self._delta_files + 1:04d}.npz"
+        tmp_path = f"{delta_path}.tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, delta_path)
+        self._delta_files += 1
+        self._delta_rows += len(keys) + len(self._removed)
+
+    def save(self, path: str) -> None:
+        """Persist the changes since the last save.
+
+        Normally only the rows added or removed since then are written, to a
+        small delta file next to ``path``. The full index is rewritten, and
+        the deltas folded into it, after retraining or once there are
+        ``MAX_DELTAS`` deltas or they hold more than ``DELTA_FRACTION`` of
+        the index.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+
+            full = (
+                self._full_save
+                or not os.path.exists(path)
+                or self._delta_files >= self.MAX_DELTAS
+                or self._delta_rows + len(self._added) + len(self._removed) > self.DELTA_FRACTION * len(self)
+            )
+            try:
+                if full:
+                    self._save_full(path)
+                else:
+                    self._save_delta(path)
+                self._added.clear()
+                self._removed.clear()
+                self._dirty = False
+            except Exception as e:
+                print(f"Error saving ANN index {path}: {e}")
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "IVFIndex":
+        """Load a saved index and its deltas, or return an empty one if there isn't one"""
+        index = cls(**kwargs)
+        if not os.path.exists(path):
+            return index
+
+        try:
+            with np.load(path) as data:
+                stored_model = str(data["model_name"]) if "model_name" in data.files else ""
+                if stored_model != index.model_name:
+                    print(f"ANN index {path} was built with a different encoder, starting fresh")
+                    index._dirty = True
+                    index._full_save = True
+                    return index
+                keys = [str(key) for key in data["keys"]]
+                vectors = data["vectors"]
+                assign = data["assign"]
+                payloads = decode_payloads(data["payloads"])
+                centroids = data["centroids"] if "centroids" in data.files else None
+                index.dim = int(data["dim"]) or None
+                index.trained_size = int(data["trained_size"])
+                index.version = int(data["version"]) if "version" in data.files else 0
+
+            if index.dim:
+                index._vectors = np.zeros((0, index.dim), dtype=np.float16)
+            if centroids is not None:
+                index._centroids = centroids
+                index._lists = [[] for _ in range(len(centroids))]
+            index._restore_rows(keys, vectors, assign, payloads)
+
+            for delta_path in index._delta_paths(path):
+                with np.load(delta_path) as data:
+                    removed = [str(key) for key in data["removed"]]
+                    keys = [str(key) for key in data["keys"]]
+                    vectors, assign = data["vectors"], data["assign"]
+                    payloads = decode_payloads(data["payloads"])
+                    version = int(data["version"])
+                index.remove(removed)
+                index._restore_rows(keys, vectors, assign, payloads)
+                index.version = version
+                index._delta_files += 1
+                index._delta_rows += len(keys) + len(removed)
+        except Exception as e:
+            print(f"Error loading ANN index {path}: {e}")
+            return cls(**kwargs)
+
+        index._added.clear()
+        index._removed.clear()
+        index._dirty = False
+        print(f"Loaded ANN index with {len(index)} vectors from {path} ({index._delta_files} deltas)")
+        return index
+
+
+def encode_payloads(payloads: List[Any]) -> np.ndarray:
+    """Payloads as compressible UTF-8 JSON bytes rather than a 4-bytes-per-character string"""
+    return np.frombuffer(json.dumps(payloads).encode("utf-8"), dtype=np.uint8)
+
+
+def decode_payloads(array: np.ndarray) -> List[Any]:
+    return json.loads(array.tobytes().decode("utf-8"))
@@ -0,0 +1,106 @@
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Set
+
+# Usernames that look automated: "..._bot", "bot-...", "bot42", and CamelCase "...Bot".
+# "bot" inside a lowercase word is left alone so names like Talbot99 or Abbot2 pass.
+BOT_NAME_RE = re.compile(r"[-_]b[o0]t(?:[-_]|\d*$)|^b[o0]t[-_]|\bb[o0]t\d+$", re.IGNORECASE)
+CAMEL_BOT_NAME_RE = re.compile(r"[a-z0-9]B[o0]t\d*$")
+
+# Boilerplate that bots and moderator macros sign their comments with
+BOT_BODY_RE = re.compile(
+    r"\bi\s*(?:am|'m)\s*a\s*bot\b"
+    r"|\bthis action was performed automatically\b"
+    r"|\bcontact the moderators of this subreddit\b"
+    r"|\bbeep\s*boop\b"
+    r"|^\W*your (?:post|submission|comment) has been removed\b"
+    r"|\bopt[\s-]?out of (?:replies|this bot)\b",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+DELETED_AUTHOR = "[deleted]"
+
+
+def load_bot_list(path: str) -> Set[str]:
+    """Lowercased usernames from a bot list file, one per line; ``#`` starts a comment"""
+    if not path or not os.path.exists(path):
+        return set()
+
+    names = set()
+    with open(path) as f:
+        for line in f:
+            name = line.split("#", 1)[0].strip()
+            if name:
+                names.add(re.sub(r"^/?u/", "", name.lower()))
+    return names
+
+
+class AuthorFilter:
+    """Cheap check for comments whose authors are bots or otherwise useless as personas.
+
+    Works on the comment alone, before any author-history request: known
+    bot names, bot-like usernames, stickied or moderator/admin-distinguished
+    comments and bot boilerplate in the body. Authors caught by the body
+    check are remembered until ``start_run``, so their other comments in the
+    same collection run are skipped too.
+    """
+
+    def __init__(self, bot_names: Iterable[str] = ()):
+        self.bot_names = {name.lower() for name in bot_names}
+        self.skipped: Counter = Counter()
+        self._flagged: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str) -> "AuthorFilter":
+        """Filter using the bot list at ``path`` (empty if the file is missing)"""
+        names = load_bot_list(path)
+        if names:
+            print(f"Loaded {len(names)} known bot accounts from {path}")
+        return cls(names)
+
+    def start_run(self) -> None:
+        """Forget authors flagged by their comment bodies in earlier runs"""
+        with self._lock:
+            self._flagged.clear()
+
+    def reason(self, comment: Dict[str, Any]) -> Optional[str]:
+        """Why a comment's author should be skipped, or None if they look like a person"""
+        author = comment.get("author") or DELETED_AUTHOR
+        name = author.lower()
+        if author == DELETED_AUTHOR:
+            return "deleted"
+        if name in self.bot_names:
+            return "bot_list"
+        if name in self._flagged:
+            return "flagged"
+        if BOT_NAME_RE.search(author) or CAMEL_BOT_NAME_RE.search(author):
+            return "bot_name"
+        if comment.get("stickied"):
+            return "stickied"
+        if comment.get("distinguished") in ("moderator", "admin"):
+            return "distinguished"
+        if BOT_BODY_RE.search(comment.get("body") or ""):
+            with self._lock:
+                self._flagged.add(name)
+            return "bot_body"
+        return None
+
+    def skip(self, comment: Dict[str, Any]) -> bool:
+        """True if the comment's author must not cost an author-history request, counting why"""
+        reason = self.reason(comment)
+        if reason is not None:
+            with self._lock:
+                self.skipped[reason] += 1
+        return reason is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """Known bots and skipped comments per reason"""
+        return {
+            "known_bots": len(self.bot_names),
+            "flagged_authors": len(self._flagged),
+            "skipped": dict(self.skipped),
+            "skipped_total": sum(self.skipped.values()),
+        }
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Statuses that are cached even though they can never produce a persona
+NEGATIVE_STATUSES = ("deleted", "suspended", "low_history")
+
+
+class AuthorHistoryStore:
+    """Author comment histories keyed by username, persisted as JSON with a TTL.
+
+    Lookups for the same author are deduplicated, including concurrent ones:
+    the first caller fetches while the others wait for its result. Deleted,
+    suspended and low-history authors are cached too (with their own TTL) so
+    they never cost another API call while the entry is fresh. Fetch errors
+    are not cached.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float,
+        negative_ttl_seconds: Optional[float] = None,
+        min_comments: int = 5,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds if negative_ttl_seconds is not None else ttl_seconds
+        self.min_comments = min_comments
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Dict[str, threading.Event] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path) as f:
+                self._entries = json.load(f)
+            print(f"Loaded {len(self._entries)} cached author histories from {self.path}")
+        except Exception as e:
+            print(f"Error loading author history store: {e}")
+            self._entries = {}
+
+    def _is_fresh(self, entry: Dict[str, Any]) -> bool:
+        ttl = self.negative_ttl_seconds if entry["status"] in NEGATIVE_STATUSES else self.ttl_seconds
+        return time.time() - entry["fetched_at"] < ttl
+
+    def get(self, author: str, fetcher: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return ``{"status", "comments", "fetched_at"}`` for an author.
+
+        ``fetcher`` is only called on a miss and must return a dict with a
+        ``status`` ("ok", "deleted", "suspended" or "error") and ``comments``.
+        """
+        if author == "[deleted]":
+            return {"status": "deleted", "comments": [], "fetched_at": time.time()}
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(author)
+                if entry and self._is_fresh(entry):
+                    self.hits += 1
+                    return entry
+
+                waiter = self._in_flight.get(author)
+                if waiter is None:
+                    self._in_flight[author] = threading.Event()
+                    self.misses += 1
+                    break
+
+            # Someone else is fetching this author; wait and re-check
+            waiter.wait()
+
+        try:
+            result = fetcher(author)
+            comments = result.get("comments", [])
+            status = result.get("status", "ok")
+            if status == "ok" and len(comments) < self.min_comments:
+                status = "low_history"
+
+            entry = {"status": status, "comments": comments, "fetched_at": time.time()}
+            with self._lock:
+                if status != "error":
+                    self._entries[author] = entry
+                    self._dirty = True
+            return entry
+        finally:
+            with self._lock:
+                self._in_flight.pop(author).set()
+
+    def put(self, author: str, comments: List[Dict[str, Any]], fetched_at: Optional[float] = None) -> None:
+        """Store a history obtained elsewhere (e.g. an offline dump) as if it had been fetched"""
+        status = "ok" if len(comments) >= self.min_comments else "low_history"
+        with self._lock:
+            self._entries[author] = {
+                "status": status,
+                "comments": comments,
+                "fetched_at": fetched_at if fetched_at is not None else time.time(),
+            }
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write fresh entries to disk, dropping expired ones"""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            self._entries = {
+                author: entry for author, entry in self._entries.items() if self._is_fresh(entry)
+            }
+            entries = dict(self._entries)
+            self._dirty = False
+
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving author history store: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry counts by status and hit/miss counters"""
+        with self._lock:
+            by_status: Dict[str, int] = {}
+            for entry in self._entries.values():
+                by_status[entry["status"]] = by_status.get(entry["status"], 0) + 1
+
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "by_status": by_status,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else None,
+        }
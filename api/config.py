@@ -1,4 +1,5 @@
 import os
+import importlib.util
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -22,16 +23,95 @@ MAX_PERSONAS = int(os.getenv("MAX_PERSONAS", "5"))
 MIN_COMMENTS_FOR_PERSONA = int(os.getenv("MIN_COMMENTS_FOR_PERSONA", "5"))
 REDDIT_POST_LIMIT = int(os.getenv("REDDIT_POST_LIMIT", "200"))
 TOP_SIMILAR_POSTS = int(os.getenv("TOP_SIMILAR_POSTS", "10"))
+BM25_SHORTLIST_SIZE = int(os.getenv("BM25_SHORTLIST_SIZE", "0"))  # 0 embeds every candidate
 
-# Validate required environment variables
+# Reddit fetching
+REDDIT_BACKEND = os.getenv("REDDIT_BACKEND", "praw")  # "praw" or "fixture" (offline)
+REDDIT_FIXTURE_PATHS = os.getenv("REDDIT_FIXTURE_PATHS", "../reddit_data.json")  # comma-separated
+REDDIT_FIXTURE_LATENCY_MS = float(os.getenv("REDDIT_FIXTURE_LATENCY_MS", "0"))
+REDDIT_FIXTURE_ERROR_RATE = float(os.getenv("REDDIT_FIXTURE_ERROR_RATE", "0"))
+REDDIT_FIXTURE_RATE_LIMIT = int(os.getenv("REDDIT_FIXTURE_RATE_LIMIT", "0"))  # simulated calls per 10 minutes, 0 = unlimited
+REDDIT_FETCH_WORKERS = int(os.getenv("REDDIT_FETCH_WORKERS", "4"))  # 1 fetches sequentially
+REDDIT_REQUESTS_PER_MINUTE = float(os.getenv("REDDIT_REQUESTS_PER_MINUTE", "90"))  # pace until rate-limit headers arrive
+REDDIT_RATE_LIMIT_RESERVE = int(os.getenv("REDDIT_RATE_LIMIT_RESERVE", "2"))  # requests held back until the window resets
+REDDIT_RATE_LIMIT_RETRIES = int(os.getenv("REDDIT_RATE_LIMIT_RETRIES", "2"))  # retries after a 429
+REDDIT_FLAIR_SEARCH = os.getenv("REDDIT_FLAIR_SEARCH", "true").lower() == "true"  # filter flair on Reddit's side
+REDDIT_MATCH_TARGET = int(os.getenv("REDDIT_MATCH_TARGET", "0"))  # stop paging after this many matches, 0 = never
+STREAM_LISTING_PAGES = os.getenv("STREAM_LISTING_PAGES", "true").lower() == "true"  # encode pages as they arrive
+SHALLOW_COMMENT_FETCH = os.getenv("SHALLOW_COMMENT_FETCH", "true").lower() == "true"  # depth-1 top comments only
+LAZY_AUTHOR_HYDRATION = os.getenv("LAZY_AUTHOR_HYDRATION", "true").lower() == "true"
+STREAMING_PIPELINE = os.getenv("STREAMING_PIPELINE", "true").lower() == "true"  # stop collecting at MAX_PERSONAS
+
+# Post snapshot store
+USE_POST_SNAPSHOTS = os.getenv("USE_POST_SNAPSHOTS", "true").lower() == "true"
+POST_SNAPSHOT_DIR = os.getenv("POST_SNAPSHOT_DIR", "post_snapshots")
+SNAPSHOT_REUSE_SECONDS = float(os.getenv("SNAPSHOT_REUSE_SECONDS", "300"))  # reuse without any Reddit calls
+SNAPSHOT_FULL_REFRESH_HOURS = float(os.getenv("SNAPSHOT_FULL_REFRESH_HOURS", "6"))  # delta refresh until then
+SNAPSHOT_MAX_POSTS = int(os.getenv("SNAPSHOT_MAX_POSTS", "400"))
+SIMILAR_POSTS_CACHE_SIZE = int(os.getenv("SIMILAR_POSTS_CACHE_SIZE", "128"))  # results per snapshot version, 0 disables
+MINHASH_DEDUPE_THRESHOLD = float(os.getenv("MINHASH_DEDUPE_THRESHOLD", "0.9"))  # drop near-duplicate posts, 0 disables
+SNAPSHOT_REFRESH_METADATA = os.getenv("SNAPSHOT_REFRESH_METADATA", "true").lower() == "true"  # bulk-refresh stored posts
+
+# Historical corpus: every collected post per subreddit in a persistent ANN index
+USE_CORPUS_INDEX = os.getenv("USE_CORPUS_INDEX", "true").lower() == "true"
+ANN_INDEX_DIR = os.getenv("ANN_INDEX_DIR", "ann_indexes")
+ANN_NLIST = int(os.getenv("ANN_NLIST", "0"))  # IVF lists, 0 picks sqrt(corpus size)
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "8"))  # lists scanned per query
+ANN_TRAIN_MIN = int(os.getenv("ANN_TRAIN_MIN", "1000"))  # exhaustive search below this many posts
+
+# Author history store
+AUTHOR_STORE_PATH = os.getenv("AUTHOR_STORE_PATH", "author_histories.json")
+AUTHOR_CACHE_TTL_HOURS = float(os.getenv("AUTHOR_CACHE_TTL_HOURS", "24"))
+AUTHOR_NEGATIVE_TTL_HOURS = float(os.getenv("AUTHOR_NEGATIVE_TTL_HOURS", "168"))  # deleted/suspended/low-history
+AUTHOR_PREFILTER = os.getenv("AUTHOR_PREFILTER", "true").lower() == "true"  # skip bots before any history request
+BOT_LIST_PATH = os.getenv("BOT_LIST_PATH", "bot_authors.txt")  # known bot accounts, one per line
+
+# Model settings
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # torch, onnx or onnx-int8
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "")  # ONNX file inside the model repo, empty for the default
+ONNX_EXPORT_DIR = os.getenv("ONNX_EXPORT_DIR", "onnx_models")  # where locally quantized models are kept
+ENCODE_POOL_WORKERS = int(os.getenv("ENCODE_POOL_WORKERS", "0"))  # worker processes for large batches, 0 disables
+ENCODE_POOL_MIN_BATCH = int(os.getenv("ENCODE_POOL_MIN_BATCH", "256"))  # smaller batches are encoded in-process
+ENCODE_POOL_SHARD_SIZE = int(os.getenv("ENCODE_POOL_SHARD_SIZE", "64"))
+TEXT_PREPROCESSING = os.getenv("TEXT_PREPROCESSING", "true").lower() == "true"  # strip markdown/URLs before encoding
+EMBEDDING_MAX_TOKENS = int(os.getenv("EMBEDDING_MAX_TOKENS", "256"))  # encoder sequence length, text past it is cut
+PROMPT_TEXT_TOKENS = int(os.getenv("PROMPT_TEXT_TOKENS", "64"))  # per title/content/comment in LLM prompts
+TEXT_PREP_CACHE_SIZE = int(os.getenv("TEXT_PREP_CACHE_SIZE", "50000"))
+MODEL_IDLE_SECONDS = float(os.getenv("MODEL_IDLE_SECONDS", "900"))
+MODEL_MEMORY_LIMIT_MB = float(os.getenv("MODEL_MEMORY_LIMIT_MB", "0"))  # 0 disables idle unloading
+
+# Embedding cache
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.npz")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "20000"))
+EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "float16")  # float32, float16 or pca
+EMBEDDING_PCA_DIMS = int(os.getenv("EMBEDDING_PCA_DIMS", "128"))
+EMBEDDING_PCA_MIN_FIT = int(os.getenv("EMBEDDING_PCA_MIN_FIT", "1000"))  # cached vectors needed before fitting
+
+# BERTScore collector (code_just_in_case)
+BERTSCORE_CACHE_PATH = os.getenv("BERTSCORE_CACHE_PATH", "bertscore_token_cache.npz")
+BERTSCORE_CACHE_MAX_TOKENS = int(os.getenv("BERTSCORE_CACHE_MAX_TOKENS", "100000"))  # ~200 MB with deberta-xlarge
+BERTSCORE_MINHASH_PATH = os.getenv("BERTSCORE_MINHASH_PATH", "bertscore_minhash.npz")  # signatures for the Jaccard fallback
+
+# Validate required environment variables (offline tools that only touch local stores turn this off)
+REQUIRE_CREDENTIALS = os.getenv("REQUIRE_CREDENTIALS", "true").lower() == "true"
 required_vars = [
-    "REDDIT_CLIENT_ID",
-    "REDDIT_CLIENT_SECRET", 
     "SUPABASE_URL",
     "SUPABASE_ANON_KEY",
     "GEMINI_API_KEY"
 ]
+if REDDIT_BACKEND == "praw":
+    required_vars += ["REDDIT_CLIENT_ID", "REDDIT_CLIENT_SECRET"]
 
 missing_vars = [var for var in required_vars if not os.getenv(var)]
-if missing_vars:
-    raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
\ No newline at end of file
+if missing_vars and REQUIRE_CREDENTIALS:
+    raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
+
+# The ONNX encoder backends need the extra from sentence-transformers[onnx]; catch that before any model loads
+if EMBEDDING_BACKEND.startswith("onnx"):
+    missing_packages = [name for name in ("onnxruntime", "optimum") if importlib.util.find_spec(name) is None]
+    if missing_packages:
+        raise ValueError(
+            f"EMBEDDING_BACKEND={EMBEDDING_BACKEND} needs {', '.join(missing_packages)}: "
+            "pip install 'sentence-transformers[onnx]' or set EMBEDDING_BACKEND=torch"
+        )
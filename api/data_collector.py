@@ -1,30 +1,116 @@
 import os
 import json
-import praw
+import time
+import heapq
+import queue
+import threading
 import numpy as np
-from typing import Optional, List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Iterator, Iterable, Tuple
 from supabase import create_client, Client
-from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
+from model_manager import model_manager
+from embedding_cache import EmbeddingCache, content_hash
+from rate_limiter import RequestScheduler
+from lexical import BM25Index
+from similarity import recall_at_k, ranking_parity, score_matrix, top_k_indices
+from snapshot_store import PostSnapshotStore
+from stores import (
+    REMOVED_CONTENT,
+    CORPUS_FIELDS,
+    EMBEDDING_MODEL_KEY,
+    author_store,
+    author_filter,
+    snapshot_store,
+    embedding_cache,
+    embed_posts,
+    register_encoder,
+    encode_texts,
+    post_text,
+    corpus_index_path,
+    corpus_payload,
+    get_corpus_index,
+)
+from minhash import MinHasher, MinHashLSH
+from result_cache import SimilarPostsCache
+from reddit_backend import RedditBackend, PrawBackend, FixtureBackend, RateLimited
 from config import (
     REDDIT_CLIENT_ID,
     REDDIT_CLIENT_SECRET,
     REDDIT_USER_AGENT,
+    REDDIT_BACKEND,
+    REDDIT_FIXTURE_PATHS,
+    REDDIT_FIXTURE_LATENCY_MS,
+    REDDIT_FIXTURE_ERROR_RATE,
+    REDDIT_FIXTURE_RATE_LIMIT,
     SUPABASE_URL,
     SUPABASE_ANON_KEY,
     REDDIT_POST_LIMIT,
     TOP_SIMILAR_POSTS,
+    BM25_SHORTLIST_SIZE,
+    EMBEDDING_BACKEND,
+    EMBEDDING_STORAGE,
+    REDDIT_FETCH_WORKERS,
+    REDDIT_REQUESTS_PER_MINUTE,
+    REDDIT_RATE_LIMIT_RESERVE,
+    REDDIT_RATE_LIMIT_RETRIES,
+    STREAM_LISTING_PAGES,
+    REDDIT_FLAIR_SEARCH,
+    REDDIT_MATCH_TARGET,
+    USE_POST_SNAPSHOTS,
+    SNAPSHOT_REUSE_SECONDS,
+    SNAPSHOT_FULL_REFRESH_HOURS,
+    SNAPSHOT_MAX_POSTS,
+    SNAPSHOT_REFRESH_METADATA,
+    MINHASH_DEDUPE_THRESHOLD,
+    SIMILAR_POSTS_CACHE_SIZE,
+    USE_CORPUS_INDEX,
+    ANN_INDEX_DIR,
+    SHALLOW_COMMENT_FETCH,
 )
 
 # Supabase setup
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
 
-# Reddit API setup
-reddit = praw.Reddit(
-    client_id=REDDIT_CLIENT_ID,
-    client_secret=REDDIT_CLIENT_SECRET,
-    user_agent=REDDIT_USER_AGENT,
-)
+# Reddit API setup: live praw or an offline fixture
+def create_reddit_backend() -> RedditBackend:
+    """Build the Reddit backend selected by REDDIT_BACKEND"""
+    if REDDIT_BACKEND == "fixture":
+        return FixtureBackend(
+            [path.strip() for path in REDDIT_FIXTURE_PATHS.split(",") if path.strip()],
+            latency_seconds=REDDIT_FIXTURE_LATENCY_MS / 1000,
+            error_rate=REDDIT_FIXTURE_ERROR_RATE,
+            rate_limit=REDDIT_FIXTURE_RATE_LIMIT,
+        )
+    return PrawBackend(
+        client_id=REDDIT_CLIENT_ID,
+        client_secret=REDDIT_CLIENT_SECRET,
+        user_agent=REDDIT_USER_AGENT,
+    )
+
+
+reddit_backend = create_reddit_backend()
+
+# Every Reddit call queues here by priority and is paced to the budget Reddit reports
+reddit_scheduler = RequestScheduler(REDDIT_REQUESTS_PER_MINUTE, reserve=REDDIT_RATE_LIMIT_RESERVE)
+LISTING_PAGE_SIZE = 100  # Reddit returns at most 100 items per listing request
+INFO_BATCH_SIZE = 100  # /api/info accepts up to 100 fullnames per request
+
+# Reddit calls run on long-lived threads so each keeps its praw client, and the client's OAuth token, across runs
+fetch_pool = ThreadPoolExecutor(max_workers=REDDIT_FETCH_WORKERS, thread_name_prefix="reddit-fetch")
+# Listing prefetch and the streaming comment lookahead
+background_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="reddit-background")
+
+# Word-set signatures for spotting reposts and crossposts in a snapshot
+minhasher = MinHasher()
+
+# Top-k results per submission, valid while the snapshot (and corpus) version is unchanged
+similar_posts_cache = SimilarPostsCache(SIMILAR_POSTS_CACHE_SIZE)
+
+
+def warmup_models() -> None:
+    """Load the sentence encoder and run a dummy batch so the first request is fast"""
+    model_manager.warmup([EMBEDDING_MODEL_KEY])
+
 
 def get_latest_submission() -> Optional[Dict[str, Any]]:
     """Get the most recent submission from Supabase"""
@@ -45,12 +131,25 @@ def get_latest_submission() -> Optional[Dict[str, Any]]:
         return None
 
 
+def reddit_call(kind: str, method, *args, **kwargs):
+    """Run one Reddit request through the scheduler, waiting out and retrying 429s"""
+    for attempt in range(REDDIT_RATE_LIMIT_RETRIES + 1):
+        reddit_scheduler.acquire(kind)
+        try:
+            return method(*args, **kwargs)
+        except RateLimited as e:
+            reddit_scheduler.throttle(e.retry_after)
+            print(f"Reddit rate limit hit on a {kind} request, waiting {e.retry_after:.0f}s")
+            if attempt == REDDIT_RATE_LIMIT_RETRIES:
+                raise
+        finally:
+            reddit_scheduler.update(reddit_backend.rate_limits())
+
+
 def test_reddit_connection() -> bool:
     """Test if Reddit API credentials are working"""
     try:
-        subreddit = reddit.subreddit("python")
-        # Try to access a basic property to test connection
-        _ = subreddit.display_name
+        reddit_call("info", reddit_backend.check_connection)
         print("Reddit connection test: Connection succeeded.")
         return True
     except Exception as e:
@@ -58,67 +157,418 @@ def test_reddit_connection() -> bool:
         return False
 
 
+def flair_search_query(submission_flair: str, is_nsfw: bool) -> str:
+    """Reddit search query that matches a flair exactly and the requested NSFW setting"""
+    flair = submission_flair.replace('"', '\\"')
+    return f'flair_name:"{flair}" nsfw:{"yes" if is_nsfw else "no"}'
+
+
+def iter_reddit_post_pages(
+    subreddit_name: str,
+    submission_flair: Optional[str] = None,
+    is_nsfw: bool = False,
+    limit: int = REDDIT_POST_LIMIT,
+    flair_search: bool = REDDIT_FLAIR_SEARCH,
+    target_count: int = REDDIT_MATCH_TARGET,
+    sort: str = "hot",
+    newer_than: Optional[float] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield filtered posts one listing page at a time, as each page arrives.
+
+    With ``flair_search`` the flair constraint is sent to Reddit as a search
+    query (sorted by hot) instead of filtering the hot listing locally, so
+    pages fetched scale with matching posts. Paging stops early once
+    ``target_count`` matching posts have been found (0 = read up to ``limit``).
+    Results are still filtered locally since search matching is loose.
+
+    ``sort="new"`` with ``newer_than`` set to a ``created_utc`` stops paging
+    at the first post that is not newer, which is how snapshots are
+    refreshed incrementally. Reddit's ``before`` is not used for this: it
+    returns only the single page next to the anchor, and nothing at all
+    once the anchor post is deleted.
+    """
+    subreddit_name = subreddit_name.replace("r/", "")
+
+    try:
+        query = flair_search_query(submission_flair, is_nsfw) if flair_search and submission_flair else None
+        listing = reddit_backend.iter_posts(subreddit_name, sort=sort, limit=limit, query=query)
+
+        page = []
+        seen = 0
+        matched = 0
+        pages_fetched = 0
+
+        while True:
+            # Listings are paged 100 posts per request; wait for a slot before each page is pulled
+            if seen % LISTING_PAGE_SIZE == 0:
+                reddit_scheduler.acquire("listing")
+            try:
+                post = next(listing, None)
+            finally:
+                if seen % LISTING_PAGE_SIZE == 0:
+                    reddit_scheduler.update(reddit_backend.rate_limits())
+            if post is None or (newer_than is not None and post.get("created_utc", 0) <= newer_than):
+                break
+            seen += 1
+
+            # Filter NSFW and flair if specified
+            if post["nsfw"] == is_nsfw and (not submission_flair or post["flair"] == submission_flair):
+                page.append(post)
+                matched += 1
+
+            if seen % LISTING_PAGE_SIZE == 0:
+                pages_fetched += 1
+                yield page
+                page = []
+                if target_count and matched >= target_count:
+                    break
+
+        if seen % LISTING_PAGE_SIZE:
+            pages_fetched += 1
+            yield page
+
+        print(f"Fetched {pages_fetched} listing page(s): {matched} of {seen} posts matched")
+    except RateLimited as e:
+        reddit_scheduler.throttle(e.retry_after)
+        print(f"Reddit rate limit hit while paging {subreddit_name}, keeping what was fetched: {e}")
+    except Exception as e:
+        print(f"Error fetching Reddit posts: {e}")
+
+
 def fetch_reddit_posts(
     subreddit_name: str, 
     submission_flair: Optional[str] = None, 
     is_nsfw: bool = False, 
-    limit: int = REDDIT_POST_LIMIT
+    limit: int = REDDIT_POST_LIMIT,
+    sort: str = "hot",
+    newer_than: Optional[float] = None,
+    encode_pages: bool = False,
 ) -> List[Dict[str, Any]]:
-    """Fetch posts from Reddit with filtering"""
-    subreddit_name = subreddit_name.replace("r/", "")
+    """Fetch posts from Reddit with filtering.
 
-    try:
-        subreddit = reddit.subreddit(subreddit_name)
-        posts = []
+    With ``encode_pages`` each listing page is embedded into the embedding
+    cache while the next one is being fetched, so ranking the posts later
+    only reads the cache.
+    """
+    pages = iter_reddit_post_pages(
+        subreddit_name, submission_flair, is_nsfw, limit, sort=sort, newer_than=newer_than
+    )
+    if not encode_pages:
+        return [post for page in pages for post in page]
+
+    posts = []
+    for page in prefetch(pages):
+        if page:
+            try:
+                embed_posts(page)
+            except Exception as e:
+                print(f"Error encoding listing page: {e}")
+        posts.extend(page)
+    return posts
+
+
+def fetch_info(fullnames: List[str]) -> Optional[List[Dict[str, Any]]]:
+    """Bulk-fetch current post/comment metadata, 100 fullnames per request.
+
+    Returns None if any batch fails so callers can keep what they had.
+    """
+    things = []
+    for i in range(0, len(fullnames), INFO_BATCH_SIZE):
+        try:
+            things.extend(reddit_call("info", reddit_backend.info, fullnames[i:i + INFO_BATCH_SIZE]))
+        except Exception as e:
+            print(f"Error fetching info for {len(fullnames)} items: {e}")
+            return None
+    return things
+
+
+def refresh_posts(posts: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """Current versions of the given posts, dropping ones that were removed or deleted"""
+    refreshed = fetch_info([f"t3_{post['id']}" for post in posts])
+    if refreshed is None:
+        return None
+    return [post for post in refreshed if post["content"] not in REMOVED_CONTENT]
+
+
+def refresh_post_scores(posts: List[Dict[str, Any]]) -> None:
+    """Update the scores of posts in place with one bulk info request"""
+    refreshed = fetch_info([f"t3_{post['id']}" for post in posts])
+    if not refreshed:
+        return
+
+    scores = {post["id"]: post["score"] for post in refreshed}
+    for post in posts:
+        post["score"] = scores.get(post["id"], post["score"])
+
+
+def get_candidate_posts(
+    subreddit_name: str,
+    submission_flair: Optional[str] = None,
+    is_nsfw: bool = False,
+    encode_pages: bool = False,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Candidate posts for a submission, served from the local snapshot store.
+
+    A snapshot younger than SNAPSHOT_REUSE_SECONDS is reused as-is. Until
+    SNAPSHOT_FULL_REFRESH_HOURS it is refreshed incrementally by pulling only
+    posts newer than the newest one stored; after that the listing is
+    refetched in full. Returns the posts and the snapshot (with its version).
+
+    With SNAPSHOT_REFRESH_METADATA, a delta refresh also bulk-refreshes the
+    stored posts through /api/info so edits, score changes and removals are
+    picked up without refetching the listing.
+
+    ``encode_pages`` embeds fetched listing pages as they arrive (see
+    ``fetch_reddit_posts``), overlapping encoding with paging on refreshes.
+    """
+    snapshot = snapshot_store.load(subreddit_name, submission_flair, is_nsfw)
+    if snapshot is None:
+        snapshot = PostSnapshotStore.new_snapshot(subreddit_name, submission_flair, is_nsfw)
+
+    now = time.time()
+    if snapshot["posts"] and now - snapshot["refreshed_at"] < SNAPSHOT_REUSE_SECONDS:
+        print(f"Reusing post snapshot v{snapshot['version']} "
+              f"({len(snapshot['posts'])} posts, {now - snapshot['refreshed_at']:.0f}s old)")
+        return snapshot["posts"], snapshot
+
+    if snapshot["posts"] and now - snapshot["full_refresh_at"] < SNAPSHOT_FULL_REFRESH_HOURS * 3600:
+        new_posts = fetch_reddit_posts(
+            subreddit_name, submission_flair, is_nsfw,
+            limit=REDDIT_POST_LIMIT,
+            sort="new",
+            newer_than=PostSnapshotStore.newest_created(snapshot),
+            encode_pages=encode_pages,
+        )
+        refreshed = refresh_posts(snapshot["posts"]) if SNAPSHOT_REFRESH_METADATA else None
+        if refreshed is not None:
+            if USE_CORPUS_INDEX:
+                gone = {post["id"] for post in snapshot["posts"]} - {post["id"] for post in refreshed}
+                remove_from_corpus(subreddit_name, list(gone))
+            changed = PostSnapshotStore.merge(
+                snapshot, refreshed + new_posts, replace=True, max_posts=SNAPSHOT_MAX_POSTS, full_refresh=False
+            )
+        else:
+            changed = PostSnapshotStore.merge(snapshot, new_posts, max_posts=SNAPSHOT_MAX_POSTS)
+        print(f"Delta refresh of post snapshot: {changed} new or changed posts, now v{snapshot['version']}")
+    else:
+        posts = fetch_reddit_posts(
+            subreddit_name, submission_flair, is_nsfw, limit=REDDIT_POST_LIMIT, encode_pages=encode_pages
+        )
+        if not posts:
+            return snapshot["posts"], snapshot
+        changed = PostSnapshotStore.merge(snapshot, posts, replace=True)
+        print(f"Full refresh of post snapshot: {changed} new or changed posts, now v{snapshot['version']}")
+
+    snapshot_store.save(snapshot)
+    return snapshot["posts"], snapshot
 
-        for submission in subreddit.hot(limit=limit):
-            # Filter NSFW
-            if submission.over_18 != is_nsfw:
-                continue
 
-            # Filter flair if specified
-            if submission_flair and submission.link_flair_text != submission_flair:
+def sync_minhash_index(snapshot: Dict[str, Any]) -> MinHashLSH:
+    """Load the MinHash index stored next to a snapshot and bring it in line with its posts"""
+    path = snapshot_store.sidecar_path(snapshot, "minhash.npz")
+    index = MinHashLSH.load(path, minhasher.num_perm)
+
+    texts = {EmbeddingCache.make_key(post): f"{post['title']} {post['content']}" for post in snapshot["posts"]}
+    if index.sync(texts, minhasher):
+        index.save(path)
+    return index
+
+
+def drop_near_duplicates(
+    reddit_posts: List[Dict[str, Any]],
+    index: MinHashLSH,
+    threshold: float = MINHASH_DEDUPE_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """Keep only the highest-scoring post of each group of near-duplicates (reposts, crossposts)"""
+    posts = {EmbeddingCache.make_key(post): post for post in reddit_posts}
+    dropped = set()
+    for key, other, _ in index.near_duplicates(threshold):
+        if key in posts and other in posts and key not in dropped and other not in dropped:
+            dropped.add(key if posts[key].get("score", 0) < posts[other].get("score", 0) else other)
+
+    if dropped:
+        print(f"Dropped {len(dropped)} near-duplicate posts (estimated Jaccard >= {threshold})")
+    return [post for key, post in posts.items() if key not in dropped]
+
+
+def update_corpus_index(subreddit_name: str, reddit_posts: List[Dict[str, Any]]) -> int:
+    """Add new or edited posts to the subreddit's corpus and return how many were indexed"""
+    index = get_corpus_index(subreddit_name)
+    fresh = [
+        post for post in reddit_posts
+        if (index.payload(post["id"]) or {}).get("content_hash") != content_hash(post)
+    ]
+    if not fresh:
+        return 0
+
+    index.add([post["id"] for post in fresh], embed_posts(fresh), [corpus_payload(post) for post in fresh])
+
+    os.makedirs(ANN_INDEX_DIR, exist_ok=True)
+    index.save(corpus_index_path(subreddit_name))
+    return len(fresh)
+
+
+def remove_from_corpus(subreddit_name: str, post_ids: List[str]) -> None:
+    """Delete posts that were removed on Reddit from the subreddit's corpus"""
+    if not post_ids:
+        return
+
+    index = get_corpus_index(subreddit_name)
+    if index.remove(post_ids):
+        index.save(corpus_index_path(subreddit_name))
+
+
+def find_similar_posts_corpus(
+    target_post: Dict[str, Any],
+    top_k: int = TOP_SIMILAR_POSTS,
+    target_embedding: Optional[np.ndarray] = None,
+) -> List[Dict[str, Any]]:
+    """Nearest posts to a submission in its subreddit's historical corpus, with the same filters"""
+    index = get_corpus_index(target_post["subreddit"])
+    flair = target_post.get("submission_flair")
+    is_nsfw = bool(target_post.get("is_nsfw"))
+
+    if target_embedding is None:
+        target_embedding = encode_target(target_post)
+    results = index.search(
+        target_embedding,
+        top_k,
+        predicate=lambda post: bool(post.get("nsfw")) == is_nsfw and (not flair or post.get("flair") == flair),
+    )
+
+    similar_posts = []
+    for _, similarity, payload in results:
+        post = {field: payload.get(field) for field in CORPUS_FIELDS}
+        # Like link posts, fall back to the title until the post is refreshed
+        post["content"] = post["title"]
+        post["similarity_score"] = similarity
+        similar_posts.append(post)
+    return similar_posts
+
+
+def merge_corpus_results(
+    target_post: Dict[str, Any],
+    reddit_posts: List[Dict[str, Any]],
+    similar_posts: List[Dict[str, Any]],
+    top_k: int = TOP_SIMILAR_POSTS,
+    target_embedding: Optional[np.ndarray] = None,
+) -> List[Dict[str, Any]]:
+    """Index the current candidates and mix the best historical posts into the top-k.
+
+    Historical posts are checked against /api/info first: removed ones are
+    dropped (and deleted from the corpus) and the rest get their current
+    text and score, which the corpus doesn't store.
+    """
+    subreddit_name = target_post["subreddit"]
+    added = update_corpus_index(subreddit_name, reddit_posts)
+
+    current_ids = {post["id"] for post in reddit_posts}
+    historical = [
+        post for post in find_similar_posts_corpus(target_post, top_k, target_embedding)
+        if post["id"] not in current_ids
+    ]
+    if historical:
+        refreshed = refresh_posts(historical)
+        if refreshed is not None:
+            alive = {post["id"]: post for post in refreshed}
+            remove_from_corpus(subreddit_name, [post["id"] for post in historical if post["id"] not in alive])
+            historical = [
+                dict(alive[post["id"]], similarity_score=post["similarity_score"])
+                for post in historical if post["id"] in alive
+            ]
+
+    merged = sorted(similar_posts + historical, key=lambda post: -post["similarity_score"])[:top_k]
+    from_corpus = sum(post["id"] not in current_ids for post in merged)
+    print(f"Historical corpus: {len(get_corpus_index(subreddit_name))} posts ({added} added), "
+          f"{from_corpus} of the top {len(merged)} are older posts")
+    return merged
+
+
+def prefetch(items: Iterable[Any], depth: int = 2) -> Iterator[Any]:
+    """Run an iterator in a background thread, buffering up to ``depth`` items ahead.
+
+    Lets network paging continue while the consumer is busy (e.g. encoding).
+    """
+    buffer: "queue.Queue" = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
                 continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        finally:
+            put(done)
+
+    background_pool.submit(produce)
+
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
 
-            posts.append({
-                "title": submission.title,
-                "content": submission.selftext if submission.selftext else submission.title,
-                "url": submission.url,
-                "score": submission.score,
-                "flair": submission.link_flair_text,
-                "nsfw": submission.over_18,
-                "id": submission.id,
-            })
-
-        return posts
-    except Exception as e:
-        print(f"Error fetching Reddit posts: {e}")
-        return []
+
+def encode_target(target_post: Dict[str, Any]) -> np.ndarray:
+    """Normalized embedding of a submission, encoded without the post cache"""
+    return model_manager.encode(
+        EMBEDDING_MODEL_KEY, [post_text(target_post)], convert_to_numpy=True, normalize_embeddings=True
+    )[0]
+
+
+def bm25_shortlist(
+    target_post: Dict[str, str],
+    reddit_posts: List[Dict[str, Any]],
+    shortlist_size: int,
+) -> List[Dict[str, Any]]:
+    """Cheap lexical first stage: keep the posts with the best BM25 score for the target"""
+    index = BM25Index([f"{post['title']} {post['content']}" for post in reddit_posts])
+    top_indices = index.top_n(f"{target_post['title']} {target_post['content']}", shortlist_size)
+    return [reddit_posts[idx] for idx in top_indices]
 
 
 def find_similar_posts_embeddings(
     target_post: Dict[str, str], 
     reddit_posts: List[Dict[str, Any]], 
-    top_k: int = TOP_SIMILAR_POSTS
+    top_k: int = TOP_SIMILAR_POSTS,
+    shortlist_size: int = BM25_SHORTLIST_SIZE,
+    use_cache: bool = True,
+    target_embedding: Optional[np.ndarray] = None,
 ) -> List[Dict[str, Any]]:
-    """Find most similar posts using SentenceTransformers embeddings + cosine similarity"""
+    """Find most similar posts using SentenceTransformers embeddings + cosine similarity.
+
+    If ``shortlist_size`` is set and smaller than the candidate pool, a BM25
+    prefilter narrows the candidates first and only the shortlist is embedded.
+    """
     if not reddit_posts:
         return []
 
-    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-
     try:
-        target_text = f"{target_post['title']} {target_post['content']}"
-        reddit_texts = [f"{post['title']} {post['content']}" for post in reddit_posts]
-
-        # Encode with sentence transformer
-        target_embedding = model.encode([target_text], convert_to_numpy=True, normalize_embeddings=True)
-        reddit_embeddings = model.encode(reddit_texts, convert_to_numpy=True, normalize_embeddings=True)
+        if shortlist_size and len(reddit_posts) > shortlist_size:
+            reddit_posts = bm25_shortlist(target_post, reddit_posts, shortlist_size)
+            print(f"BM25 prefilter kept {len(reddit_posts)} candidates for embedding")
 
-        similarities = cosine_similarity(target_embedding, reddit_embeddings)[0]
+        # Encode with the shared sentence transformer; posts come from the cache when unchanged
+        if target_embedding is None:
+            target_embedding = encode_target(target_post)
+        reddit_embeddings = embed_posts(reddit_posts, use_cache=use_cache)
 
-        # Get top k
-        top_indices = np.argsort(similarities)[::-1][:top_k]
+        # Embeddings are normalized, so a dot product is the cosine similarity
+        similarities = score_matrix(target_embedding, reddit_embeddings)[0]
+        top_indices = top_k_indices(similarities, top_k)[0]
 
         similar_posts = []
         for idx in top_indices:
@@ -132,100 +582,548 @@ def find_similar_posts_embeddings(
         return []
 
 
-def fetch_post_comments(post_id: str, max_comments: int = 10) -> List[Dict[str, Any]]:
-    """Fetch comments for a specific post"""
+def find_similar_posts_batch(
+    target_posts: List[Dict[str, str]],
+    reddit_posts: List[Dict[str, Any]],
+    top_k: int = TOP_SIMILAR_POSTS,
+    use_cache: bool = True,
+) -> List[List[Dict[str, Any]]]:
+    """Find the most similar posts for many submissions against one candidate pool.
+
+    All targets are encoded in one batch and scored with a single matrix
+    product, then each row's top-k is picked with ``argpartition``. Returns
+    one list of similar posts per target, in the same order as ``target_posts``.
+    """
+    if not target_posts:
+        return []
+    if not reddit_posts:
+        return [[] for _ in target_posts]
+
     try:
-        submission = reddit.submission(id=post_id)
-        submission.comment_sort = 'top'
-        
-        comments = []
-        for comment in submission.comments:
-            if len(comments) >= max_comments:
-                break
-            
-            if not isinstance(comment, praw.models.MoreComments) and comment.body:
-                comment_data = {
-                    "score": comment.score,
-                    "body": comment.body,
-                    "author": comment.author.name if comment.author else "[deleted]",
-                    "author_hot_comments": []
-                }
-                
-                # Fetch author's other comments
-                if comment.author and comment.author.name != "[deleted]":
-                    try:
-                        for auth_comment in comment.author.comments.hot(limit=10):
-                            if (not isinstance(auth_comment, praw.models.MoreComments) and 
-                                auth_comment.body and len(comment_data['author_hot_comments']) < 10):
-                                comment_data['author_hot_comments'].append({
-                                    "score": auth_comment.score,
-                                    "body": auth_comment.body
-                                })
-                    except Exception as e:
-                        print(f"   Error fetching comments for {comment.author.name}: {e}")
-                        
-                comments.append(comment_data)
-        
-        return comments
+        target_embeddings = encode_texts([post_text(post) for post in target_posts])
+        reddit_embeddings = embed_posts(reddit_posts, use_cache=use_cache)
+
+        similarities = score_matrix(target_embeddings, reddit_embeddings)
+        top_indices = top_k_indices(similarities, top_k)
+    except Exception as e:
+        print(f"Error computing similarities: {e}")
+        return [[] for _ in target_posts]
+
+    results = []
+    for row, indices in enumerate(top_indices):
+        similar_posts = []
+        for idx in indices:
+            post = reddit_posts[idx].copy()
+            post["similarity_score"] = float(similarities[row, idx])
+            similar_posts.append(post)
+        results.append(similar_posts)
+
+    print(f"Scored {len(target_posts)} submissions against {len(reddit_posts)} posts in one batch")
+    return results
+
+
+def find_similar_posts_streaming(
+    target_post: Dict[str, str],
+    pages: Iterable[List[Dict[str, Any]]],
+    top_k: int = TOP_SIMILAR_POSTS,
+    target_embedding: Optional[np.ndarray] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Score posts page by page, keeping a running top-k in a heap.
+
+    Each page is embedded as soon as it arrives, so when ``pages`` is fed by
+    ``prefetch`` encoding overlaps with fetching the next page. Returns all
+    posts seen and the top-k most similar, best first.
+    """
+    if target_embedding is None:
+        target_embedding = encode_target(target_post)
+
+    all_posts = []
+    heap = []  # (similarity, position, post); smallest similarity on top
+
+    for page in pages:
+        if not page:
+            continue
+
+        try:
+            similarities = embed_posts(page) @ target_embedding
+        except Exception as e:
+            print(f"Error computing similarities: {e}")
+            continue
+
+        for post, similarity in zip(page, similarities):
+            entry = (float(similarity), len(all_posts), post)
+            all_posts.append(post)
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif entry[0] > heap[0][0]:
+                heapq.heapreplace(heap, entry)
+
+    similar_posts = []
+    for similarity, _, post in sorted(heap, key=lambda entry: (-entry[0], entry[1])):
+        post = post.copy()
+        post["similarity_score"] = similarity
+        similar_posts.append(post)
+
+    return all_posts, similar_posts
+
+
+def evaluate_bm25_prefilter(
+    target_post: Dict[str, str],
+    reddit_posts: List[Dict[str, Any]],
+    top_k: int = TOP_SIMILAR_POSTS,
+    shortlist_size: int = BM25_SHORTLIST_SIZE,
+) -> Dict[str, Any]:
+    """Compare the BM25 two-stage path against exact embedding search.
+
+    Both paths bypass the embedding cache so the latencies are comparable.
+    Recall is the share of the exact top-k that the two-stage path also returns.
+    """
+    start = time.perf_counter()
+    exact = find_similar_posts_embeddings(target_post, reddit_posts, top_k, shortlist_size=0, use_cache=False)
+    exact_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    two_stage = find_similar_posts_embeddings(
+        target_post, reddit_posts, top_k, shortlist_size=shortlist_size, use_cache=False
+    )
+    two_stage_seconds = time.perf_counter() - start
+
+    report = {
+        "candidates": len(reddit_posts),
+        "shortlist_size": shortlist_size,
+        "recall_at_k": recall_at_k([p["id"] for p in exact], [p["id"] for p in two_stage]),
+        "exact_seconds": exact_seconds,
+        "two_stage_seconds": two_stage_seconds,
+    }
+    print(f"BM25 prefilter: recall@{top_k} {report['recall_at_k']:.2f}, "
+          f"{two_stage_seconds:.2f}s vs {exact_seconds:.2f}s exact over {len(reddit_posts)} posts")
+    return report
+
+
+def evaluate_encoder_backend(
+    target_post: Dict[str, str],
+    reddit_posts: List[Dict[str, Any]],
+    top_k: int = TOP_SIMILAR_POSTS,
+    reference_backend: str = "torch",
+) -> Dict[str, Any]:
+    """Check that the configured encoder backend ranks posts like the reference one.
+
+    Both encoders score the same posts without the embedding cache. The
+    reference model is unloaded afterwards unless it is the configured one.
+    """
+    texts = [post_text(target_post)]
+    texts += [post_text(post) for post in reddit_posts]
+
+    reference_key = register_encoder(reference_backend, heavy=True)
+    timings = {}
+    scores = {}
+    for key in (reference_key, EMBEDDING_MODEL_KEY):
+        model_manager.get(key)
+        start = time.perf_counter()
+        embeddings = model_manager.encode(key, texts, convert_to_numpy=True, normalize_embeddings=True)
+        timings[key] = time.perf_counter() - start
+        scores[key] = embeddings[1:] @ embeddings[0]
+
+    if reference_key != EMBEDDING_MODEL_KEY:
+        model_manager.unload(reference_key)
+
+    report = {
+        "backend": EMBEDDING_BACKEND,
+        "reference_backend": reference_backend,
+        "candidates": len(reddit_posts),
+        **ranking_parity(scores[reference_key], scores[EMBEDDING_MODEL_KEY], top_k),
+        "reference_seconds": timings[reference_key],
+        "backend_seconds": timings[EMBEDDING_MODEL_KEY],
+    }
+    print(f"Encoder {EMBEDDING_BACKEND} vs {reference_backend}: recall@{top_k} {report['recall_at_k']:.2f}, "
+          f"max score delta {report['max_score_delta']:.4f}, "
+          f"{report['backend_seconds']:.2f}s vs {report['reference_seconds']:.2f}s over {len(texts)} texts")
+    return report
+
+
+def evaluate_embedding_storage(
+    target_post: Dict[str, str],
+    reddit_posts: List[Dict[str, Any]],
+    top_k: int = TOP_SIMILAR_POSTS,
+) -> Dict[str, Any]:
+    """Check that rankings from compactly stored embeddings match full precision"""
+    texts = [post_text(target_post)]
+    texts += [post_text(post) for post in reddit_posts]
+    embeddings = encode_texts(texts)
+
+    full_scores = embeddings[1:] @ embeddings[0]
+    stored_scores = embedding_cache.roundtrip(embeddings[1:]) @ embeddings[0]
+
+    report = {
+        "storage": EMBEDDING_STORAGE,
+        "candidates": len(reddit_posts),
+        "bytes_per_vector": embedding_cache.bytes_per_vector(),
+        "full_bytes_per_vector": embeddings[0].astype(np.float32).nbytes,
+        **ranking_parity(full_scores, stored_scores, top_k),
+    }
+    print(f"Embedding storage {EMBEDDING_STORAGE}: recall@{top_k} {report['recall_at_k']:.2f}, "
+          f"max score delta {report['max_score_delta']:.4f}, "
+          f"{report['bytes_per_vector']} vs {report['full_bytes_per_vector']} bytes per vector")
+    return report
+
+
+def fetch_top_level_comments(post_id: str, max_comments: int = 10) -> List[Dict[str, Any]]:
+    """Fetch the top-level comments of a post.
+
+    Author histories are not fetched; the comments have no
+    ``author_hot_comments`` key until ``hydrate_author_history`` fills it in.
+    Comments by bots and other low-signal authors are left out.
+    """
+    try:
+        comments = reddit_call(
+            "comments", reddit_backend.top_level_comments, post_id, max_comments, shallow=SHALLOW_COMMENT_FETCH
+        )
     except Exception as e:
         print(f"   Error fetching comments for post {post_id}: {e}")
         return []
 
+    if author_filter is None:
+        return comments
+    return [comment for comment in comments if comment["author"] == "[deleted]" or not author_filter.skip(comment)]
 
-def collect_data() -> Optional[List[Dict[str, Any]]]:
-    """Main function to collect and structure all the data."""
-    if not test_reddit_connection():
-        print("Please check your Reddit API credentials")
-        return None
 
-    latest_submission = get_latest_submission()
-    if not latest_submission:
-        print("No submissions found in database")
-        return None
+def print_comment_fetch_stats(stats: Dict[str, int]) -> None:
+    """Report how much data comment-tree fetching transferred"""
+    mode = "shallow" if SHALLOW_COMMENT_FETCH else "full"
+    print(f"Comment trees ({mode}): {stats.get('comment_requests', 0)} requests, "
+          f"{stats.get('comment_objects', 0)} objects, {stats.get('comment_bytes', 0) / 1024:.1f} KB")
+    if author_filter is not None and author_filter.skipped:
+        print(f"Author prefilter has skipped {sum(author_filter.skipped.values())} comments so far "
+              f"({', '.join(f'{reason}: {count}' for reason, count in author_filter.skipped.most_common())})")
+
+
+def fetch_author_history(author_name: str, limit: int = 10) -> Dict[str, Any]:
+    """Fetch an author's hot comments from Reddit, reporting deleted/suspended accounts"""
+    try:
+        return reddit_call("author", reddit_backend.author_comments, author_name, limit)
+    except Exception as e:
+        print(f"   Error fetching comments for {author_name}: {e}")
+        return {"status": "error", "comments": []}
+
+
+def fetch_author_hot_comments(author_name: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Return an author's hot comments, served from the author store when known"""
+    entry = author_store.get(author_name, lambda name: fetch_author_history(name, limit))
+    return entry["comments"]
+
+
+def hydrate_author_history(comment_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Fill in ``author_hot_comments`` for a comment on first use and return it"""
+    if "author_hot_comments" not in comment_data:
+        if comment_data["author"] != "[deleted]" and not (author_filter and author_filter.skip(comment_data)):
+            comment_data["author_hot_comments"] = list(fetch_author_hot_comments(comment_data["author"]))
+        else:
+            comment_data["author_hot_comments"] = []
+    return comment_data["author_hot_comments"]
+
+
+def fetch_post_comments(
+    post_id: str,
+    max_comments: int = 10,
+    hydrate_authors: bool = True,
+) -> List[Dict[str, Any]]:
+    """Fetch comments for a specific post"""
+    comments = fetch_top_level_comments(post_id, max_comments)
+
+    # Fetch author's other comments
+    if hydrate_authors:
+        for comment_data in comments:
+            hydrate_author_history(comment_data)
+
+    return comments
+
+
+def fetch_comments_concurrently(
+    posts: List[Dict[str, Any]],
+    max_comments: int = 10,
+    hydrate_authors: bool = True,
+) -> Dict[str, Any]:
+    """Fetch comment trees and author histories for many posts on the shared fetch pool.
+
+    Returns a mapping of post id to its top-level comments (same shape as
+    ``fetch_post_comments``) plus per-stage wall times under ``"timings"``.
+    Each author's history is fetched once even if they comment on several posts.
+    """
+    timings = {}
+    authors = []
+
+    start = time.perf_counter()
+    trees = list(fetch_pool.map(lambda post: fetch_top_level_comments(post["id"], max_comments), posts))
+    timings["comment_trees"] = time.perf_counter() - start
+
+    if hydrate_authors:
+        authors = sorted({
+            comment["author"]
+            for comments in trees
+            for comment in comments
+            if comment["author"] != "[deleted]" and not (author_filter and author_filter.skip(comment))
+        })
 
+        start = time.perf_counter()
+        histories = dict(zip(authors, fetch_pool.map(fetch_author_hot_comments, authors)))
+        timings["author_histories"] = time.perf_counter() - start
+
+        for comments in trees:
+            for comment_data in comments:
+                comment_data["author_hot_comments"] = list(histories.get(comment_data["author"], []))
+
+    comments_by_post = {post["id"]: comments for post, comments in zip(posts, trees)}
+
+    print(f"Fetched {sum(len(c) for c in trees)} comments from {len(posts)} posts "
+          f"in {timings['comment_trees']:.2f}s, {len(authors)} author histories "
+          f"in {timings.get('author_histories', 0.0):.2f}s ({REDDIT_FETCH_WORKERS} workers)")
+
+    return {"comments": comments_by_post, "timings": timings}
+
+
+def find_submission_similar_posts(
+    latest_submission: Dict[str, Any],
+    timings: Dict[str, float],
+) -> Optional[List[Dict[str, Any]]]:
+    """Fetch candidate posts for a submission and rank them by similarity.
+
+    With post snapshots, a repeat of the same submission against an
+    unchanged snapshot and corpus is answered from ``similar_posts_cache``,
+    with scores refreshed in one info request.
+    """
     print(f"Latest submission: {latest_submission['title']}")
     print(f"Subreddit: {latest_submission['subreddit']}")
     print(f"Flair: {latest_submission['submission_flair']}")
     print(f"NSFW: {latest_submission['is_nsfw']}")
     print("-" * 50)
 
-    reddit_posts = fetch_reddit_posts(
-        subreddit_name=latest_submission["subreddit"],
-        submission_flair=latest_submission["submission_flair"],
-        is_nsfw=latest_submission["is_nsfw"],
-        limit=REDDIT_POST_LIMIT,
-    )
+    # Encode each listing page while the next one is being fetched. A BM25
+    # shortlist only embeds a few posts, so there is nothing to overlap then.
+    stream_pages = STREAM_LISTING_PAGES and not BM25_SHORTLIST_SIZE
+    if stream_pages and not USE_POST_SNAPSHOTS:
+        start = time.perf_counter()
+        pages = prefetch(iter_reddit_post_pages(
+            subreddit_name=latest_submission["subreddit"],
+            submission_flair=latest_submission["submission_flair"],
+            is_nsfw=latest_submission["is_nsfw"],
+            limit=REDDIT_POST_LIMIT,
+        ))
+        target_embedding = encode_target(latest_submission)
+        reddit_posts, similar_posts = find_similar_posts_streaming(
+            latest_submission, pages, target_embedding=target_embedding
+        )
+        timings["listing_and_similarity"] = time.perf_counter() - start
 
-    print(f"Found {len(reddit_posts)} matching Reddit posts")
+        print(f"Found {len(reddit_posts)} matching Reddit posts")
 
-    if not reddit_posts:
-        print("No matching posts found on Reddit")
-        return None
+        if not reddit_posts:
+            print("No matching posts found on Reddit")
+            return None
+    else:
+        start = time.perf_counter()
+        if USE_POST_SNAPSHOTS:
+            reddit_posts, snapshot = get_candidate_posts(
+                subreddit_name=latest_submission["subreddit"],
+                submission_flair=latest_submission["submission_flair"],
+                is_nsfw=latest_submission["is_nsfw"],
+                encode_pages=stream_pages,
+            )
+            # The key covers the snapshot version and dedupe threshold, so a hit needs no dedupe pass
+            cached = similar_posts_cache.get(similar_posts_cache_key(latest_submission, snapshot))
+            if cached is not None:
+                timings["listing"] = time.perf_counter() - start
+                print(f"Reusing similar posts for this submission (snapshot v{snapshot['version']})")
+                # Cached results keep the scores they were computed with
+                refresh_post_scores(cached)
+                print_similar_posts(cached)
+                return cached
+
+            if MINHASH_DEDUPE_THRESHOLD and reddit_posts:
+                reddit_posts = drop_near_duplicates(reddit_posts, sync_minhash_index(snapshot))
+        else:
+            reddit_posts = fetch_reddit_posts(
+                subreddit_name=latest_submission["subreddit"],
+                submission_flair=latest_submission["submission_flair"],
+                is_nsfw=latest_submission["is_nsfw"],
+                limit=REDDIT_POST_LIMIT,
+            )
+        timings["listing"] = time.perf_counter() - start
+
+        print(f"Found {len(reddit_posts)} matching Reddit posts")
+
+        if not reddit_posts:
+            print("No matching posts found on Reddit")
+            return None
+
+        start = time.perf_counter()
+        # The target is encoded once for the candidates and the historical corpus
+        target_embedding = encode_target(latest_submission)
+        similar_posts = find_similar_posts_embeddings(
+            latest_submission, reddit_posts, target_embedding=target_embedding
+        )
+        timings["similarity"] = time.perf_counter() - start
+
+        if USE_POST_SNAPSHOTS and similar_posts:
+            # Snapshot scores can be hours old; one info request refreshes all top-k
+            refresh_post_scores(similar_posts)
+
+    if USE_CORPUS_INDEX:
+        start = time.perf_counter()
+        similar_posts = merge_corpus_results(
+            latest_submission, reddit_posts, similar_posts, target_embedding=target_embedding
+        )
+        timings["corpus"] = time.perf_counter() - start
+
+    if USE_POST_SNAPSHOTS and similar_posts:
+        # Key on the versions after this run's own corpus inserts, so a repeat is a hit
+        similar_posts_cache.put(similar_posts_cache_key(latest_submission, snapshot), similar_posts)
+
+    print_similar_posts(similar_posts)
+    return similar_posts
 
-    similar_posts = find_similar_posts_embeddings(latest_submission, reddit_posts)
 
+def similar_posts_cache_key(submission: Dict[str, Any], snapshot: Dict[str, Any]) -> str:
+    """Result cache key: the submission plus everything that defines its candidate set"""
+    corpus_version = get_corpus_index(submission["subreddit"]).version if USE_CORPUS_INDEX else 0
+    return SimilarPostsCache.make_key(
+        submission,
+        snapshot["version"],
+        corpus_version,
+        EMBEDDING_MODEL_KEY,
+        TOP_SIMILAR_POSTS,
+        MINHASH_DEDUPE_THRESHOLD,
+    )
+
+
+def print_similar_posts(similar_posts: List[Dict[str, Any]]) -> None:
     print(f"\nTop {len(similar_posts)} most similar posts (using Sentence Transformers):")
     print("=" * 50)
     
-    final_data = []
-
     for i, post in enumerate(similar_posts, 1):
         print(f"{i}. Title: {post['title'][:50]}...")
         print(f"   Score: {post['score']} | Similarity: {post['similarity_score']:.3f}")
         print(f"   Flair: {post['flair']} | NSFW: {post['nsfw']}")
         print("-" * 40)
-        
-        post_data = post.copy()
-        post_data['top_level_comments'] = fetch_post_comments(post['id'])
-        
-        final_data.append(post_data)
+
+
+def collect_data(
+    latest_submission: Optional[Dict[str, Any]] = None,
+    hydrate_authors: bool = True,
+) -> Optional[List[Dict[str, Any]]]:
+    """Main function to collect and structure all the data.
+
+    ``latest_submission`` is read from the database unless the caller
+    already has it. With ``hydrate_authors=False`` comments are returned without author
+    histories; pass ``hydrate_author_history`` to the persona builder so it
+    only fetches histories for the authors it actually considers.
+    """
+    if not test_reddit_connection():
+        print("Please check your Reddit API credentials")
+        return None
+
+    if latest_submission is None:
+        latest_submission = get_latest_submission()
+    if not latest_submission:
+        print("No submissions found in database")
+        return None
+
+    timings = {}
+    calls_before = reddit_scheduler.calls
+    comment_stats_before = reddit_backend.fetch_stats
+    if author_filter is not None:
+        author_filter.start_run()
+    embedding_cache.start_run()
+
+    similar_posts = find_submission_similar_posts(latest_submission, timings)
+    # Posts encoded for this run are written out once, not after every batch
+    embedding_cache.save()
+    if not similar_posts:
+        return None
+
+    final_data = []
+
+    start = time.perf_counter()
+    if REDDIT_FETCH_WORKERS > 1:
+        fetched = fetch_comments_concurrently(similar_posts, hydrate_authors=hydrate_authors)
+        timings.update(fetched["timings"])
+        for post in similar_posts:
+            post_data = post.copy()
+            post_data['top_level_comments'] = fetched["comments"][post['id']]
+            final_data.append(post_data)
+    else:
+        for post in similar_posts:
+            post_data = post.copy()
+            post_data['top_level_comments'] = fetch_post_comments(post['id'], hydrate_authors=hydrate_authors)
+            final_data.append(post_data)
+    timings["comments"] = time.perf_counter() - start
+
+    author_store.save()
 
     print(f"\nCollected data for {len(final_data)} posts with comments.")
+    print("Stage timings: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
+    print(f"Reddit requests made: {reddit_scheduler.calls - calls_before}")
+    print_comment_fetch_stats(reddit_backend.fetch_stats - comment_stats_before)
+    print(f"Author store: {author_store.stats()}")
     return final_data
 
 
+def iter_collect_data(
+    latest_submission: Optional[Dict[str, Any]] = None,
+    hydrate_authors: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """Streaming version of ``collect_data`` that yields posts as their comments arrive.
+
+    The next post's comments are prefetched in the background while the
+    consumer works on the current one. Closing the generator stops
+    collection, so no comment trees are fetched past what the consumer used.
+    """
+    if not test_reddit_connection():
+        print("Please check your Reddit API credentials")
+        return
+
+    if latest_submission is None:
+        latest_submission = get_latest_submission()
+    if not latest_submission:
+        print("No submissions found in database")
+        return
+
+    timings = {}
+    calls_before = reddit_scheduler.calls
+    comment_stats_before = reddit_backend.fetch_stats
+    if author_filter is not None:
+        author_filter.start_run()
+    embedding_cache.start_run()
+
+    similar_posts = find_submission_similar_posts(latest_submission, timings)
+    # Posts encoded for this run are written out once, not after every batch
+    embedding_cache.save()
+    if not similar_posts:
+        return
+
+    yielded = 0
+    pending = background_pool.submit(fetch_post_comments, similar_posts[0]['id'], hydrate_authors=hydrate_authors)
+    try:
+        for i, post in enumerate(similar_posts):
+            comments = pending.result()
+            if i + 1 < len(similar_posts):
+                pending = background_pool.submit(
+                    fetch_post_comments, similar_posts[i + 1]['id'], hydrate_authors=hydrate_authors
+                )
+
+            post_data = post.copy()
+            post_data['top_level_comments'] = comments
+            yielded += 1
+            yield post_data
+    finally:
+        pending.cancel()
+        author_store.save()
+        print(f"Streamed {yielded}/{len(similar_posts)} posts, "
+              f"Reddit requests made: {reddit_scheduler.calls - calls_before}")
+        print_comment_fetch_stats(reddit_backend.fetch_stats - comment_stats_before)
+
+
 if __name__ == "__main__":
-    final_data = collect_data()
+    final_data = collect_data(hydrate_authors=True)
     if final_data:
         with open("reddit_data.json", "w") as f:
             json.dump(final_data, f, indent=2)
@@ -0,0 +1,306 @@
+"""Seed the local stores from offline Reddit dumps instead of crawling through praw.
+
+Dumps are NDJSON files of submissions and comments, one object per line,
+optionally zstd-compressed (``.zst``, needs the ``zstandard`` package).
+Files are streamed line by line and matching posts are embedded and indexed
+in batches as they are read, so memory stays bounded by what is kept: the
+ids of matching posts, the newest ``SNAPSHOT_MAX_POSTS`` of them, their top
+comments and the histories of those comments' authors, never the dump itself.
+Only local stores are touched, so no API credentials are needed.
+
+Usage:
+    python dump_ingest.py --submissions RS_sub.zst --comments RC_sub.zst --subreddit sub [--flair F] [--nsfw]
+"""
+import argparse
+import heapq
+import io
+import json
+import math
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+os.environ.setdefault("REQUIRE_CREDENTIALS", "false")
+
+from ann_index import IVFIndex
+from snapshot_store import PostSnapshotStore
+from stores import (
+    REMOVED_CONTENT,
+    author_filter,
+    author_store,
+    embedding_cache,
+    embed_posts,
+    get_corpus_index,
+    snapshot_store,
+    corpus_index_path,
+    corpus_payload,
+)
+from config import ANN_INDEX_DIR, SNAPSHOT_MAX_POSTS, USE_CORPUS_INDEX
+
+ENCODE_BATCH_SIZE = 1024
+PROGRESS_EVERY = 1_000_000
+
+
+def open_dump(path: str) -> io.TextIOBase:
+    """Open a plain or zstd-compressed NDJSON dump as a text stream"""
+    if not path.endswith(".zst"):
+        return open(path, encoding="utf-8")
+
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("Reading .zst dumps needs the zstandard package (pip install zstandard)")
+
+    # Pushshift-style dumps are compressed with a long window
+    reader = zstandard.ZstdDecompressor(max_window_size=2 ** 31).stream_reader(open(path, "rb"))
+    return io.TextIOWrapper(reader, encoding="utf-8")
+
+
+def iter_dump_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield every JSON object in a dump, skipping lines that don't parse"""
+    start = time.perf_counter()
+    with open_dump(path) as f:
+        for count, line in enumerate(f, 1):
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+            if count % PROGRESS_EVERY == 0:
+                print(f"  {path}: {count:,} lines ({count / (time.perf_counter() - start):,.0f}/s)")
+
+
+def record_to_post(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a submission record into the post dict the collector uses"""
+    return {
+        "title": record.get("title", ""),
+        "content": record.get("selftext") or record.get("title", ""),
+        "url": record.get("url"),
+        "score": record.get("score", 0),
+        "flair": record.get("link_flair_text"),
+        "nsfw": bool(record.get("over_18")),
+        "id": record["id"],
+        "created_utc": float(record.get("created_utc") or 0),
+    }
+
+
+def hot_rank(score: int, created_utc: float) -> float:
+    """Reddit's hot ranking, used to pick an author's "hot" comments from a dump"""
+    order = math.log10(max(abs(score), 1))
+    sign = 1 if score > 0 else -1 if score < 0 else 0
+    return sign * order + created_utc / 45000
+
+
+def push_bounded(heap: List[Tuple], item: Tuple, size: int) -> None:
+    """Keep only the ``size`` largest items in a min-heap"""
+    if len(heap) < size:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+
+def iter_posts(
+    path: str,
+    subreddit_name: str,
+    submission_flair: Optional[str],
+    is_nsfw: bool,
+) -> Iterator[Dict[str, Any]]:
+    """Submissions of a subreddit matching the same NSFW/flair filters as ``fetch_reddit_posts``"""
+    subreddit_name = subreddit_name.replace("r/", "").lower()
+    for record in iter_dump_records(path):
+        if str(record.get("subreddit", "")).lower() != subreddit_name or "id" not in record:
+            continue
+
+        post = record_to_post(record)
+        if post["content"] in REMOVED_CONTENT:
+            continue
+        if post["nsfw"] == is_nsfw and (not submission_flair or post["flair"] == submission_flair):
+            yield post
+
+
+def read_top_level_comments(
+    path: str,
+    post_ids: Set[str],
+    max_comments: int = 10,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """The top-scoring top-level comments of each post, like a "top"-sorted comment tree"""
+    heaps: Dict[str, List[Tuple]] = {}
+    for record in iter_dump_records(path):
+        link_id = record.get("link_id", "")
+        post_id = link_id[3:]
+        if post_id not in post_ids or record.get("parent_id") != link_id or not record.get("body"):
+            continue
+
+        comment = {
+            "score": record.get("score", 0),
+            "body": record["body"],
+            "author": record.get("author") or "[deleted]",
+            "stickied": bool(record.get("stickied")),
+            "distinguished": record.get("distinguished"),
+        }
+        if comment["author"] != "[deleted]" and author_filter is not None and author_filter.skip(comment):
+            continue
+        push_bounded(heaps.setdefault(post_id, []), (comment["score"], record.get("id", ""), comment), max_comments)
+
+    return {
+        post_id: [comment for _, _, comment in sorted(heap, key=lambda item: (-item[0], item[1]))]
+        for post_id, heap in heaps.items()
+    }
+
+
+def read_author_histories(
+    path: str,
+    authors: Set[str],
+    limit: int = 10,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Each author's ``limit`` hottest comments, shaped like ``author_hot_comments``"""
+    heaps: Dict[str, List[Tuple]] = {}
+    for record in iter_dump_records(path):
+        author = record.get("author")
+        if author not in authors or not record.get("body"):
+            continue
+
+        score = record.get("score", 0)
+        rank = hot_rank(score, float(record.get("created_utc") or 0))
+        push_bounded(heaps.setdefault(author, []), (rank, record.get("id", ""), {"score": score, "body": record["body"]}), limit)
+
+    return {
+        author: [comment for _, _, comment in sorted(heap, key=lambda item: (-item[0], item[1]))]
+        for author, heap in heaps.items()
+    }
+
+
+def index_posts(posts: List[Dict[str, Any]], index: Optional[IVFIndex]) -> None:
+    """Embed a batch of posts into the embedding cache and the corpus index"""
+    vectors = embed_posts(posts, verbose=False)
+    if index is not None:
+        index.add([post["id"] for post in posts], vectors, [corpus_payload(post) for post in posts])
+
+
+def ingest_posts(
+    path: str,
+    subreddit_name: str,
+    submission_flair: Optional[str],
+    is_nsfw: bool,
+) -> Tuple[Set[str], List[Dict[str, Any]], int]:
+    """Stream matching posts through batched embedding and indexing.
+
+    Returns the ids of all matching posts, the newest ``SNAPSHOT_MAX_POSTS``
+    of them (newest first) and how many posts had to be encoded.
+    """
+    index = get_corpus_index(subreddit_name) if USE_CORPUS_INDEX else None
+    post_ids: Set[str] = set()
+    newest: List[Tuple] = []
+    batch: List[Dict[str, Any]] = []
+    misses = embedding_cache.misses
+
+    for post in iter_posts(path, subreddit_name, submission_flair, is_nsfw):
+        if post["id"] in post_ids:
+            continue
+        post_ids.add(post["id"])
+        push_bounded(newest, (post["created_utc"], post["id"], post), SNAPSHOT_MAX_POSTS)
+        batch.append(post)
+        if len(batch) >= ENCODE_BATCH_SIZE:
+            index_posts(batch, index)
+            batch = []
+    if batch:
+        index_posts(batch, index)
+
+    # Every post is looked up once per run, so each cache miss is one encoded post
+    encoded = embedding_cache.misses - misses
+    embedding_cache.save()
+    if index is not None:
+        os.makedirs(ANN_INDEX_DIR, exist_ok=True)
+        index.save(corpus_index_path(subreddit_name))
+    return post_ids, [post for _, _, post in sorted(newest, key=lambda item: (-item[0], item[1]))], encoded
+
+
+def ingest_dumps(
+    submissions_path: str,
+    comments_path: Optional[str],
+    subreddit_name: str,
+    submission_flair: Optional[str] = None,
+    is_nsfw: bool = False,
+    max_comments: int = 10,
+    fixture_out: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Stream the dumps into the snapshot store, embedding cache, corpus index and author store.
+
+    Every matching post is embedded and indexed; the snapshot gets the
+    newest ``SNAPSHOT_MAX_POSTS``. Comments are read in two passes, first
+    the top-level comments of the matching posts, then the histories of
+    their authors, so only those are ever kept in memory. With
+    ``fixture_out`` the snapshot's posts with comments and author histories
+    are also written in the reddit_data.json format the fixture backend
+    serves.
+    """
+    start = time.perf_counter()
+    if author_filter is not None:
+        author_filter.start_run()
+    embedding_cache.start_run()
+    print(f"Reading and embedding submissions from {submissions_path}...")
+    post_ids, newest, encoded = ingest_posts(submissions_path, subreddit_name, submission_flair, is_nsfw)
+    print(f"{len(post_ids):,} matching posts, {encoded:,} encoded")
+
+    comments: Dict[str, List[Dict[str, Any]]] = {}
+    histories: Dict[str, List[Dict[str, Any]]] = {}
+    if comments_path and post_ids:
+        print(f"Reading top-level comments from {comments_path}...")
+        comments = read_top_level_comments(comments_path, post_ids, max_comments)
+        authors = {c["author"] for post_comments in comments.values() for c in post_comments} - {"[deleted]"}
+
+        print(f"Reading histories of {len(authors):,} authors from {comments_path}...")
+        histories = read_author_histories(comments_path, authors)
+        for author in authors:
+            author_store.put(author, histories.get(author, []))
+        author_store.save()
+
+    snapshot = snapshot_store.load(subreddit_name, submission_flair, is_nsfw)
+    if snapshot is None:
+        snapshot = PostSnapshotStore.new_snapshot(subreddit_name, submission_flair, is_nsfw)
+    PostSnapshotStore.merge(snapshot, newest, max_posts=SNAPSHOT_MAX_POSTS, full_refresh=False)
+    snapshot_store.save(snapshot)
+
+    if fixture_out:
+        fixture = []
+        for post in newest:
+            post_comments = [
+                dict(comment, author_hot_comments=histories.get(comment["author"], []))
+                for comment in comments.get(post["id"], [])
+            ]
+            fixture.append(dict(post, top_level_comments=post_comments))
+        with open(fixture_out, "w") as f:
+            json.dump(fixture, f)
+        print(f"Wrote {len(fixture):,} posts to {fixture_out}")
+
+    report = {
+        "posts": len(post_ids),
+        "posts_with_comments": len(comments),
+        "authors": len(histories),
+        "encoded": encoded,
+        "snapshot_version": snapshot["version"],
+        "seconds": time.perf_counter() - start,
+    }
+    print(f"Ingestion finished: {report}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest offline Reddit dumps into the local stores")
+    parser.add_argument("--submissions", required=True, help="submissions NDJSON dump (.zst or plain)")
+    parser.add_argument("--comments", help="comments NDJSON dump (.zst or plain)")
+    parser.add_argument("--subreddit", required=True)
+    parser.add_argument("--flair", default=None)
+    parser.add_argument("--nsfw", action="store_true")
+    parser.add_argument("--max-comments", type=int, default=10)
+    parser.add_argument("--fixture-out", default=None, help="also write a reddit_data.json-style fixture")
+    args = parser.parse_args()
+
+    ingest_dumps(
+        args.submissions,
+        args.comments,
+        args.subreddit,
+        submission_flair=args.flair,
+        is_nsfw=args.nsfw,
+        max_comments=args.max_comments,
+        fixture_out=args.fixture_out,
+    )
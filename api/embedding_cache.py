@@ -0,0 +1,229 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+
+def content_hash(post: Dict[str, Any]) -> str:
+    """Short hash of a post's title and content, used to detect edits"""
+    text = f"{post.get('title', '')}{post.get('content', '')}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+STORAGE_MODES = ("float32", "float16", "pca")
+
+
+class EmbeddingCache:
+    """On-disk cache of post embeddings keyed by Reddit id + content hash.
+
+    Entries are kept in least-recently-used order and the oldest ones are
+    dropped once the cache grows past ``max_entries``. The cache is tied to a
+    model name so switching encoders never serves stale vectors.
+
+    ``storage`` sets how vectors are held in memory and on disk: "float32",
+    "float16" (half the size), or "pca", which stores float16 codes of a
+    ``pca_dims`` projection. The projection is fitted once the cache holds
+    ``pca_min_fit`` vectors; until then they are kept as float16. Lookups
+    always return full-size, normalized float32 vectors.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        model_name: str,
+        max_entries: int = 20000,
+        storage: str = "float32",
+        pca_dims: int = 128,
+        pca_min_fit: int = 1000,
+    ):
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown embedding storage '{storage}', expected one of {STORAGE_MODES}")
+
+        self.path = path
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.storage = storage
+        self.pca_dims = pca_dims
+        self.pca_min_fit = max(pca_min_fit, pca_dims)
+        self.hits = 0
+        self.misses = 0
+        self._counted: Set[str] = set()
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._pca_mean: Optional[np.ndarray] = None
+        self._pca_components: Optional[np.ndarray] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def make_key(post: Dict[str, Any]) -> str:
+        """Build the cache key for a post from its id and a hash of its text"""
+        return f"{post.get('id', '')}:{content_hash(post)}"
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with np.load(self.path) as data:
+                if str(data["model_name"]) != self.model_name:
+                    print("Embedding cache was built with a different model, starting fresh")
+                    return
+                keys = [str(key) for key in data["keys"]]
+                vectors = data["vectors"]
+                projection = (data["pca_mean"], data["pca_components"]) if "pca_components" in data.files else None
+
+            if projection is not None and self.storage == "pca" and len(projection[1]) == self.pca_dims:
+                self._pca_mean, self._pca_components = projection
+                self._entries.update(zip(keys, vectors))
+            else:
+                # Re-encode in case the storage mode changed since the cache was written
+                if projection is not None:
+                    vectors = self._reconstruct(vectors, *projection)
+                self._store(keys, np.asarray(vectors, dtype=np.float32))
+                self._dirty = False
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            print(f"Loaded {len(self._entries)} cached embeddings from {self.path}")
+        except Exception as e:
+            print(f"Error loading embedding cache: {e}")
+            self._entries.clear()
+
+    def start_run(self) -> None:
+        """Count hits and misses afresh: within a run each key is counted on its first lookup only"""
+        with self._lock:
+            self._counted.clear()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return the cached vectors for the given keys, counting hits and misses"""
+        found = {}
+        with self._lock:
+            if len(self._counted) > self.max_entries:
+                self._counted.clear()
+            for key in keys:
+                vector = self._entries.get(key)
+                if key not in self._counted:
+                    self._counted.add(key)
+                    if vector is None:
+                        self.misses += 1
+                    else:
+                        self.hits += 1
+                if vector is None:
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = vector
+
+            if found and self._pca_components is not None:
+                decoded = self._reconstruct(np.vstack(list(found.values())), self._pca_mean, self._pca_components)
+                return dict(zip(found, decoded))
+
+        return {key: vector.astype(np.float32) for key, vector in found.items()}
+
+    def put_many(self, keys: List[str], vectors: np.ndarray) -> None:
+        """Store vectors and evict the least recently used entries past the size bound"""
+        with self._lock:
+            self._store(keys, np.asarray(vectors, dtype=np.float32))
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _store(self, keys: List[str], vectors: np.ndarray) -> None:
+        """Add full-precision vectors in the configured storage format (lock held)"""
+        if self.storage == "float32":
+            stored = vectors
+        elif self._pca_components is not None:
+            stored = ((vectors - self._pca_mean) @ self._pca_components.T).astype(np.float16)
+        else:
+            stored = vectors.astype(np.float16)
+
+        for key, vector in zip(keys, stored):
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+        self._dirty = True
+
+        if (self.storage == "pca" and self._pca_components is None
+                and len(self._entries) >= self.pca_min_fit):
+            self._fit_pca()
+
+    def _fit_pca(self) -> None:
+        """Fit the projection on the cached vectors and re-encode them all (lock held)"""
+        vectors = np.vstack(list(self._entries.values())).astype(np.float32)
+        mean = vectors.mean(axis=0)
+        _, _, components = np.linalg.svd(vectors - mean, full_matrices=False)
+        self._pca_mean = mean
+        self._pca_components = components[:self.pca_dims]
+
+        codes = ((vectors - mean) @ self._pca_components.T).astype(np.float16)
+        for key, code in zip(list(self._entries), codes):
+            self._entries[key] = code
+        print(f"Fitted {self.pca_dims}-dim PCA on {len(vectors)} cached embeddings")
+
+    @staticmethod
+    def _reconstruct(codes: np.ndarray, mean: np.ndarray, components: np.ndarray) -> np.ndarray:
+        """Map PCA codes back to full-size, normalized float32 vectors"""
+        vectors = codes.astype(np.float32) @ components + mean
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def roundtrip(self, vectors: np.ndarray) -> np.ndarray:
+        """What the cache would return for these vectors, to check rankings against full precision"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.storage == "float32":
+            return vectors
+        if self._pca_components is None:
+            return vectors.astype(np.float16).astype(np.float32)
+
+        codes = ((vectors - self._pca_mean) @ self._pca_components.T).astype(np.float16)
+        return self._reconstruct(codes, self._pca_mean, self._pca_components)
+
+    def bytes_per_vector(self) -> Optional[int]:
+        """Size of one stored vector, None while the cache is empty"""
+        with self._lock:
+            for vector in self._entries.values():
+                return vector.nbytes
+        return None
+
+    def save(self) -> None:
+        """Write the cache to disk if it changed since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            keys = np.array(list(self._entries.keys()), dtype=str)
+            if self._entries:
+                vectors = np.vstack(list(self._entries.values()))
+            else:
+                vectors = np.zeros((0, 0), dtype=np.float32)
+
+            arrays = {"model_name": np.array(self.model_name), "keys": keys, "vectors": vectors}
+            if self._pca_components is not None:
+                arrays.update(pca_mean=self._pca_mean, pca_components=self._pca_components)
+
+            tmp_path = f"{self.path}.tmp.npz"
+            try:
+                np.savez(tmp_path, **arrays)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except Exception as e:
+                print(f"Error saving embedding cache: {e}")
+
+    def hit_rate(self) -> Optional[float]:
+        """Fraction of lookups served from the cache, None before any lookup"""
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters"""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "storage": self.storage,
+            "pca_fitted": self._pca_components is not None,
+            "bytes_per_vector": self.bytes_per_vector(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+        }
@@ -0,0 +1,109 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from encoders import load_sentence_encoder
+
+# Model held by each worker process, loaded once by the pool initializer
+_worker_model = None
+
+
+def _init_worker(model_name: str, backend: str, onnx_file: Optional[str], export_dir: str, threads: int) -> None:
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_model = load_sentence_encoder(model_name, backend, onnx_file=onnx_file, export_dir=export_dir)
+
+
+def _encode_shard(texts: List[str], kwargs: Dict[str, Any]) -> np.ndarray:
+    return _worker_model.encode(texts, **kwargs)
+
+
+class EncodePool:
+    """Persistent pool of worker processes that each hold the sentence encoder.
+
+    Large batches are split into shards that are encoded in parallel and
+    stitched back together in input order. The workers are started on first
+    use and then reused for every later batch, so the model is loaded once
+    per worker rather than once per call.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = "torch",
+        workers: int = 2,
+        shard_size: int = 64,
+        onnx_file: Optional[str] = None,
+        export_dir: str = "onnx_models",
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        self.workers = workers
+        self.shard_size = shard_size
+        self.onnx_file = onnx_file
+        self.export_dir = export_dir
+        self.calls = 0
+        self.items = 0
+        self.seconds = 0.0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Split the cores between workers instead of letting each one grab all of them
+                threads = max(1, (os.cpu_count() or 1) // self.workers)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # Forking a process that already runs torch threads can deadlock
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.model_name, self.backend, self.onnx_file, self.export_dir, threads),
+                )
+                print(f"Started encode pool with {self.workers} workers")
+            return self._executor
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        """Encode texts across the workers, returning embeddings in input order"""
+        start = time.perf_counter()
+        shards = [texts[i:i + self.shard_size] for i in range(0, len(texts), self.shard_size)]
+
+        try:
+            results = list(self._get_executor().map(_encode_shard, shards, [kwargs] * len(shards)))
+        except BrokenProcessPool:
+            self.close()
+            raise
+
+        embeddings = np.vstack(results)
+        with self._lock:
+            self.calls += 1
+            self.items += len(texts)
+            self.seconds += time.perf_counter() - start
+        return embeddings
+
+    def close(self) -> None:
+        """Stop the worker processes; the next encode starts a fresh pool"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the pool size and encode counters"""
+        return {
+            "workers": self.workers,
+            "running": self._executor is not None,
+            "encode_calls": self.calls,
+            "encode_items": self.items,
+            "encode_seconds": self.seconds,
+        }
@@ -0,0 +1,67 @@
+import os
+import re
+from typing import Any, Optional
+
+# Encoder backends selectable through EMBEDDING_BACKEND
+ENCODER_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Dynamically quantized export that runs on any AVX2 CPU; the sentence-transformers
+# hub repos ship it prebuilt, otherwise it is quantized locally on first load
+DEFAULT_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+
+
+def encoder_key(model_name: str, backend: str) -> str:
+    """Name a model/backend pair, so caches never mix vectors from different backends"""
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+
+def load_sentence_encoder(
+    model_name: str,
+    backend: str = "torch",
+    onnx_file: Optional[str] = None,
+    export_dir: str = "onnx_models",
+) -> Any:
+    """Load a SentenceTransformer running on PyTorch, ONNX Runtime, or int8 ONNX Runtime.
+
+    The ONNX backends need ``sentence-transformers[onnx]``. All three expose
+    the same ``encode`` API, so callers don't care which one they got.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend '{backend}', expected one of {ENCODER_BACKENDS}")
+
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+
+    if backend == "onnx":
+        model_kwargs = {"file_name": onnx_file} if onnx_file else None
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs=model_kwargs)
+
+    onnx_file = onnx_file or DEFAULT_INT8_FILE
+    try:
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs={"file_name": onnx_file})
+    except Exception as e:
+        print(f"No prebuilt {onnx_file} for {model_name} ({e}), quantizing locally")
+
+    return quantize_locally(model_name, onnx_file, export_dir)
+
+
+def quantize_locally(model_name: str, onnx_file: str, export_dir: str) -> Any:
+    """Export the model to ONNX, quantize it to int8 and load the result.
+
+    The export is kept in ``export_dir`` so it only happens once per model.
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    local_path = os.path.join(export_dir, re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name))
+    if not os.path.exists(os.path.join(local_path, onnx_file)):
+        match = re.search(r"model_qu?int8_(\w+)\.onnx$", onnx_file)
+        quantization_config = match.group(1) if match else "avx2"
+
+        model = SentenceTransformer(model_name, backend="onnx")
+        model.save(local_path)
+        export_dynamic_quantized_onnx_model(model, quantization_config, local_path)
+        print(f"Saved int8 ({quantization_config}) ONNX export of {model_name} to {local_path}")
+
+    return SentenceTransformer(local_path, backend="onnx", model_kwargs={"file_name": onnx_file})
@@ -4,13 +4,16 @@ from typing import List, Dict, Any, Tuple
 from supabase import create_client, Client
 import google.generativeai as genai
 
-from data_collector import get_latest_submission, collect_data
+from data_collector import get_latest_submission, collect_data, author_store, hydrate_author_history
+from text_prep import text_preprocessor
 from persona_generator import create_personas_from_data
 from config import (
     GEMINI_API_KEY,
     GEMINI_MODEL_NAME,
+    PROMPT_TEXT_TOKENS,
     SUPABASE_URL,
     SUPABASE_ANON_KEY,
+    LAZY_AUTHOR_HYDRATION,
 )
 
 # Init Supabase + Gemini
@@ -21,9 +24,9 @@ model = genai.GenerativeModel(GEMINI_MODEL_NAME)
 
 def generate_comment_with_retry(persona: Dict[str, Any], latest_submission: Dict[str, Any], max_retries: int = 3) -> Dict[str, Any]:
     """Generate a comment with retry logic and rate limiting"""
-    # Truncate submission content to save tokens
-    title = latest_submission['title'][:100] if len(latest_submission['title']) > 100 else latest_submission['title']
-    content = latest_submission['content'][:200] if len(latest_submission.get('content', '')) > 200 else latest_submission.get('content', '')
+    # Strip markdown/URLs and cut to the prompt token budget to save tokens
+    title = text_preprocessor.prepare(latest_submission['title'], PROMPT_TEXT_TOKENS)
+    content = text_preprocessor.prepare(latest_submission.get('content') or '', PROMPT_TEXT_TOKENS)
     
     prompt = (
         f"Role-play as: {persona['interests'][:2]}, {persona['personality_traits'][:2]}\n\n"
@@ -165,13 +168,14 @@ def generate_comments() -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         return [], []
 
     # Step 2: collect Reddit data
-    data = collect_data()
+    data = collect_data(latest_submission, hydrate_authors=not LAZY_AUTHOR_HYDRATION)
     if not data:
         print("[generate_comments] No Reddit data collected")
         return [], []
 
-    # Step 3: generate personas
-    personas = create_personas_from_data(data)
+    # Step 3: generate personas (author histories are fetched on demand)
+    personas = create_personas_from_data(data, author_history_loader=hydrate_author_history)
+    author_store.save()
     if not personas:
         print("[generate_comments] No personas generated")
         return [], []
@@ -0,0 +1,74 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Very common words carry no ranking signal and only inflate postings lists
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his i if in into is it its me my
+not of on or our she so that the their them they this to was we were what when which who
+will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents.
+
+    Scoring walks only the postings of the query terms, so a query costs
+    roughly the number of documents sharing a word with it rather than the
+    size of the corpus.
+    """
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.num_docs = len(documents)
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+
+        lengths = []
+        for doc_id, document in enumerate(documents):
+            tokens = tokenize(document)
+            lengths.append(len(tokens))
+            for term, freq in Counter(tokens).items():
+                self.postings.setdefault(term, []).append((doc_id, freq))
+
+        self.doc_lengths = np.array(lengths, dtype=np.float32)
+        self.avg_doc_length = float(self.doc_lengths.mean()) if self.num_docs else 0.0
+
+    def idf(self, term: str) -> float:
+        """Smoothed inverse document frequency (never negative)"""
+        doc_freq = len(self.postings.get(term, ()))
+        return math.log(1 + (self.num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query"""
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        if not self.num_docs:
+            return scores
+
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.avg_doc_length, 1e-9))
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            doc_ids, freqs = (np.array(column) for column in zip(*postings))
+            scores[doc_ids] += self.idf(term) * freqs * (self.k1 + 1) / (freqs + norm[doc_ids])
+
+        return scores
+
+    def top_n(self, query: str, n: int) -> np.ndarray:
+        """Indices of the ``n`` best-scoring documents, best first"""
+        scores = self.scores(query)
+        if n >= self.num_docs:
+            return np.argsort(-scores, kind="stable")
+        candidates = np.argpartition(-scores, n)[:n]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
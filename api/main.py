@@ -7,14 +7,30 @@ from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
 # Import your custom modules
-from data_collector import get_latest_submission, collect_data
-from persona_generator import create_personas_from_data
+from data_collector import (
+    get_latest_submission,
+    collect_data,
+    iter_collect_data,
+    warmup_models,
+    embedding_cache,
+    similar_posts_cache,
+    author_store,
+    hydrate_author_history,
+    reddit_scheduler,
+    author_filter,
+)
+from model_manager import model_manager
+from text_prep import text_preprocessor
+from stores import encode_pool
+from persona_generator import create_personas_from_data, create_personas_from_stream
 from generate_comments import generate_comment_with_retry, save_comments_safely, print_results, save_personas_safely
 from config import (
     GEMINI_API_KEY,
     GEMINI_MODEL_NAME,
     SUPABASE_URL,
     SUPABASE_ANON_KEY,
+    STREAMING_PIPELINE,
+    LAZY_AUTHOR_HYDRATION,
 )
 
 # --- Initialize Supabase and Gemini ---
@@ -30,6 +46,13 @@ app = FastAPI(
     version="1.0.0",
 )
 
+@app.on_event("startup")
+async def load_models():
+    """
+    Load and warm up the sentence encoder once so requests don't pay for it.
+    """
+    warmup_models()
+
 # --- Pydantic Models (for request/response validation if needed) ---
 # If you plan to have endpoints that accept data, you'll define Pydantic models.
 # For now, our main endpoint just triggers a process.
@@ -62,6 +85,28 @@ async def read_root():
     """
     return {"message": "Welcome to the Social Media Comment Generator API!"}
 
+@app.get("/model_stats")
+async def get_model_stats():
+    """
+    Report model load/encode timings, embedding cache hit rate, text preprocessing and process memory.
+    """
+    stats = model_manager.stats()
+    stats["embedding_cache"] = embedding_cache.stats()
+    stats["encode_pool"] = encode_pool.stats() if encode_pool else None
+    stats["similar_posts_cache"] = similar_posts_cache.stats()
+    stats["text_preprocessing"] = text_preprocessor.stats()
+    return stats
+
+@app.get("/reddit_status")
+async def get_reddit_status():
+    """
+    Report the Reddit request budget, current pace, queued requests per priority class
+    and the comments the author prefilter kept from costing history requests.
+    """
+    status = reddit_scheduler.status()
+    status["author_prefilter"] = author_filter.stats() if author_filter else None
+    return status
+
 @app.post("/generate_comments", response_model=GenerationResponse)
 async def generate_and_save_comments():
     """
@@ -70,6 +115,7 @@ async def generate_and_save_comments():
     """
     print("Starting comment generation process...")
     start_time = time.time()
+    reddit_calls_before = reddit_scheduler.calls
 
     # Step 1: Get latest submission
     latest_submission = get_latest_submission()
@@ -82,19 +128,29 @@ async def generate_and_save_comments():
             success=False
         )
 
-    # Step 2: Collect Reddit data
-    reddit_data = collect_data()
-    if not reddit_data:
-        print("[generate_comments] No Reddit data collected")
-        return GenerationResponse(
-            message="Error: Could not collect Reddit data.",
-            generated_comments_count=0,
-            personas_generated_count=0,
-            success=False
+    if STREAMING_PIPELINE:
+        # Steps 2-3: Stream Reddit data into persona generation, stopping at MAX_PERSONAS
+        personas = create_personas_from_stream(
+            iter_collect_data(latest_submission),
+            author_history_loader=hydrate_author_history,
         )
-
-    # Step 3: Generate personas
-    personas = create_personas_from_data(reddit_data)
+    else:
+        # Step 2: Collect Reddit data
+        reddit_data = collect_data(latest_submission, hydrate_authors=not LAZY_AUTHOR_HYDRATION)
+        if not reddit_data:
+            print("[generate_comments] No Reddit data collected")
+            return GenerationResponse(
+                message="Error: Could not collect Reddit data.",
+                generated_comments_count=0,
+                personas_generated_count=0,
+                success=False
+            )
+
+        # Step 3: Generate personas (author histories are fetched on demand)
+        personas = create_personas_from_data(reddit_data, author_history_loader=hydrate_author_history)
+
+    author_store.save()
+    print(f"Reddit requests for collection + personas: {reddit_scheduler.calls - reddit_calls_before}")
     if not personas:
         print("[generate_comments] No personas generated")
         return GenerationResponse(
@@ -128,6 +184,9 @@ async def generate_and_save_comments():
     # Step 5: Save comments to Supabase
     save_success = save_comments_safely(generated_comments)
 
+    # Free idle heavy models if we're over the memory budget
+    model_manager.release_idle()
+
     end_time = time.time()
     duration = end_time - start_time
     print(f"Comment generation process finished in {duration:.2f} seconds.")
@@ -0,0 +1,227 @@
+import os
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+MERSENNE_PRIME = (1 << 31) - 1
+MAX_HASH = np.uint32(MERSENNE_PRIME)
+
+
+def word_set(text: str) -> Set[str]:
+    """Lowercased whitespace-separated words, the set the Jaccard similarity is taken over"""
+    return set(text.lower().split())
+
+
+class MinHasher:
+    """Fixed family of ``num_perm`` hash permutations turning word sets into MinHash signatures.
+
+    The fraction of equal positions in two signatures estimates the Jaccard
+    similarity of the word sets. Token hashes use crc32, so signatures are
+    stable across processes and can be persisted.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        self.num_perm = num_perm
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text's word set (all MAX_HASH for empty text)"""
+        words = word_set(text)
+        if not words:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+
+        hashes = np.array([zlib.crc32(word.encode("utf-8")) for word in words], dtype=np.uint64) % MERSENNE_PRIME
+        permuted = (hashes[:, None] * self._a + self._b) % MERSENNE_PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def signatures(self, texts: Iterable[str]) -> np.ndarray:
+        """Signature matrix with one row per text"""
+        rows = [self.signature(text) for text in texts]
+        return np.vstack(rows) if rows else np.zeros((0, self.num_perm), dtype=np.uint32)
+
+
+def estimate_jaccard(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of one signature against a row (or matrix) of signatures"""
+    return (np.atleast_2d(others) == signature).mean(axis=1)
+
+
+class MinHashLSH:
+    """LSH index over MinHash signatures with banding.
+
+    Signatures are cut into ``bands`` bands; two items become candidates when
+    any band matches exactly, which happens with high probability above a
+    Jaccard of roughly ``(1 / bands) ** (1 / rows)``. A lookup only touches
+    the buckets of the query's bands, not every indexed item.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 32):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.signatures: Dict[str, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(bands)]
+        self._stacked: Optional[Tuple[List[str], np.ndarray]] = None
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.signatures
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def insert(self, key: str, signature: np.ndarray) -> None:
+        """Index a signature under ``key``, replacing any previous one"""
+        if key in self.signatures:
+            self.remove(key)
+
+        signature = np.asarray(signature, dtype=np.uint32)
+        self.signatures[key] = signature
+        self._stacked = None
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(band_key, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        """Drop an item from the index (no-op if it isn't indexed)"""
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        self._stacked = None
+
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del buckets[band_key]
+
+    def candidates(self, signature: np.ndarray) -> Set[str]:
+        """Keys sharing at least one band with the signature"""
+        found: Set[str] = set()
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            found |= buckets.get(band_key, set())
+        return found
+
+    def query(self, signature: np.ndarray, threshold: float = 0.0) -> List[Tuple[str, float]]:
+        """LSH candidates with their estimated Jaccard, best first, at or above ``threshold``"""
+        keys = list(self.candidates(signature))
+        if not keys:
+            return []
+
+        estimates = estimate_jaccard(signature, np.vstack([self.signatures[key] for key in keys]))
+        matches = [(key, float(estimate)) for key, estimate in zip(keys, estimates) if estimate >= threshold]
+        return sorted(matches, key=lambda match: -match[1])
+
+    def stacked(self) -> Tuple[List[str], np.ndarray]:
+        """All keys and their signatures as one matrix, rebuilt only after the index changes"""
+        if self._stacked is None:
+            keys = list(self.signatures)
+            matrix = (
+                np.vstack([self.signatures[key] for key in keys]) if keys
+                else np.zeros((0, self.num_perm), dtype=np.uint32)
+            )
+            self._stacked = (keys, matrix)
+        return self._stacked
+
+    def top_k(self, signature: np.ndarray, top_k: int) -> List[Tuple[str, float]]:
+        """The ``top_k`` items with the highest estimated Jaccard, best first.
+
+        Only LSH candidates are compared when there are enough of them;
+        otherwise the target is compared against all stored signatures in
+        one vectorised pass, which includes the candidates.
+        """
+        ranked = self.query(signature)[:top_k]
+        if len(ranked) >= top_k or len(ranked) == len(self):
+            return ranked
+
+        keys, matrix = self.stacked()
+        estimates = estimate_jaccard(signature, matrix)
+        return [(keys[i], float(estimates[i])) for i in np.argsort(-estimates, kind="stable")[:top_k]]
+
+    def sync(self, texts: Dict[str, str], hasher: MinHasher) -> bool:
+        """Make the index hold exactly ``texts``' keys, signing only keys it doesn't have yet.
+
+        Keys should change when their text does (e.g. id plus content hash),
+        so signatures of unchanged items are reused. Returns True if the
+        index changed and needs saving.
+        """
+        stale = [key for key in self.signatures if key not in texts]
+        new = [key for key in texts if key not in self]
+        for key in stale:
+            self.remove(key)
+        for key in new:
+            self.insert(key, hasher.signature(texts[key]))
+        return bool(stale or new)
+
+    def near_duplicates(self, threshold: float = 0.9) -> List[Tuple[str, str, float]]:
+        """Pairs of indexed items whose estimated Jaccard is at least ``threshold``"""
+        pairs = []
+        seen: Set[Tuple[str, str]] = set()
+        for key, signature in self.signatures.items():
+            for other, estimate in self.query(signature, threshold):
+                pair = (key, other) if key < other else (other, key)
+                if other != key and pair not in seen:
+                    seen.add(pair)
+                    pairs.append((*pair, estimate))
+        return pairs
+
+    def save(self, path: str) -> None:
+        """Persist the signatures atomically; buckets are rebuilt on load"""
+        keys, signatures = self.stacked()
+
+        tmp_path = f"{path}.tmp.npz"
+        try:
+            np.savez(
+                tmp_path,
+                bands=np.array(self.bands),
+                keys=np.array(keys, dtype=str),
+                signatures=signatures.astype(np.uint32),
+            )
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error saving MinHash index {path}: {e}")
+
+    @classmethod
+    def load(cls, path: str, num_perm: int = 128, bands: int = 32) -> "MinHashLSH":
+        """Load a saved index, or return an empty one if it is missing or was built differently"""
+        index = cls(num_perm, bands)
+        if not os.path.exists(path):
+            return index
+
+        try:
+            with np.load(path) as data:
+                if int(data["bands"]) != bands or data["signatures"].shape[1:] not in ((num_perm,), (0,)):
+                    print(f"MinHash index {path} was built with other settings, starting fresh")
+                    return index
+                for key, signature in zip(data["keys"], data["signatures"]):
+                    index.insert(str(key), signature)
+        except Exception as e:
+            print(f"Error loading MinHash index {path}: {e}")
+            return cls(num_perm, bands)
+
+        return index
+
+
+def top_k_jaccard(
+    target_text: str,
+    index: MinHashLSH,
+    top_k: int,
+    hasher: Optional[MinHasher] = None,
+) -> List[Tuple[str, float]]:
+    """Keys of the ``top_k`` indexed texts most Jaccard-similar to the target, with estimates.
+
+    Only the target is signed; the indexed signatures are reused. With 64
+    bands of 2 rows, LSH reliably catches pairs above a Jaccard of about
+    0.125. Unrelated posts typically share only 0.03-0.06, so usually
+    all stored signatures are compared.
+    """
+    hasher = hasher or MinHasher(index.num_perm)
+    return index.top_k(hasher.signature(target_text), top_k)
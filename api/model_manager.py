@@ -0,0 +1,164 @@
+import gc
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class ModelManager:
+    """Process-wide registry that loads each model once and keeps it warm.
+
+    Models are registered with a loader callable and only constructed on first
+    use. Heavy models can be released again once they have been idle for a
+    while and the process is over its memory budget.
+    """
+
+    def __init__(self, idle_seconds: float = 900.0, memory_limit_mb: Optional[float] = None):
+        self.idle_seconds = idle_seconds
+        self.memory_limit_mb = memory_limit_mb
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._heavy: Dict[str, bool] = {}
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+
+    def configure(self, idle_seconds: Optional[float] = None, memory_limit_mb: Optional[float] = None) -> None:
+        """Update the idle timeout and memory budget used for unloading"""
+        if idle_seconds is not None:
+            self.idle_seconds = idle_seconds
+        if memory_limit_mb is not None:
+            self.memory_limit_mb = memory_limit_mb
+
+    def register(self, name: str, loader: Callable[[], Any], heavy: bool = False) -> None:
+        """Register a loader for a model without loading it"""
+        with self._lock:
+            self._loaders[name] = loader
+            self._heavy[name] = heavy
+            self._stats.setdefault(name, {
+                "loaded": False,
+                "heavy": heavy,
+                "load_count": 0,
+                "load_seconds": 0.0,
+                "encode_calls": 0,
+                "encode_items": 0,
+                "encode_seconds": 0.0,
+                "last_used": None,
+            })
+
+    def is_registered(self, name: str) -> bool:
+        """Whether a loader has been registered under this name"""
+        return name in self._loaders
+
+    def get(self, name: str) -> Any:
+        """Return the model, loading it on first use"""
+        with self._lock:
+            if name not in self._loaders:
+                raise KeyError(f"No loader registered for model '{name}'")
+
+            model = self._models.get(name)
+            if model is None:
+                print(f"Loading model '{name}'...")
+                start = time.perf_counter()
+                model = self._loaders[name]()
+                elapsed = time.perf_counter() - start
+                self._models[name] = model
+
+                stats = self._stats[name]
+                stats["loaded"] = True
+                stats["load_count"] += 1
+                stats["load_seconds"] = elapsed
+                print(f"Loaded model '{name}' in {elapsed:.2f} seconds")
+
+            self._stats[name]["last_used"] = time.time()
+            return model
+
+    def encode(self, name: str, texts: List[str], **kwargs) -> Any:
+        """Encode texts with a registered SentenceTransformer-style model"""
+        model = self.get(name)
+
+        start = time.perf_counter()
+        result = model.encode(texts, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            stats = self._stats[name]
+            stats["encode_calls"] += 1
+            stats["encode_items"] += len(texts)
+            stats["encode_seconds"] += elapsed
+            stats["last_used"] = time.time()
+
+        return result
+
+    def warmup(self, names: Optional[List[str]] = None) -> None:
+        """Load the given models (default: all non-heavy ones) and run a dummy batch"""
+        if names is None:
+            names = [name for name, heavy in self._heavy.items() if not heavy]
+
+        for name in names:
+            try:
+                model = self.get(name)
+                if hasattr(model, "encode"):
+                    self.encode(name, ["warmup", "warmup batch"])
+                print(f"Warmed up model '{name}'")
+            except Exception as e:
+                print(f"Error warming up model '{name}': {e}")
+
+    def unload(self, name: str) -> bool:
+        """Drop a loaded model so its memory can be reclaimed"""
+        with self._lock:
+            if self._models.pop(name, None) is None:
+                return False
+            self._stats[name]["loaded"] = False
+
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+        print(f"Unloaded model '{name}'")
+        return True
+
+    def release_idle(self, force: bool = False, idle_seconds: Optional[float] = None) -> List[str]:
+        """Unload idle heavy models when the process is over its memory budget.
+
+        ``idle_seconds`` overrides the configured timeout, e.g. 0 from a
+        script that is done with its models until the next call.
+        """
+        idle_seconds = self.idle_seconds if idle_seconds is None else idle_seconds
+        if not force:
+            rss_mb = current_rss_mb()
+            if self.memory_limit_mb is None or rss_mb is None or rss_mb < self.memory_limit_mb:
+                return []
+
+        now = time.time()
+        with self._lock:
+            idle = [
+                name for name in self._models
+                if self._heavy.get(name)
+                and now - (self._stats[name]["last_used"] or 0) >= idle_seconds
+            ]
+
+        return [name for name in idle if self.unload(name)]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return load and encode timings for every registered model"""
+        with self._lock:
+            models = {name: dict(stats) for name, stats in self._stats.items()}
+        return {"rss_mb": current_rss_mb(), "models": models}
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB (Linux only, None elsewhere)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# Shared instance for the whole process
+model_manager = ModelManager()
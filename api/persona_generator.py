@@ -1,7 +1,9 @@
 import json
 import time
+from typing import Any, Callable, Dict, List, Optional
 import google.generativeai as genai
-from config import GEMINI_API_KEY, GEMINI_MODEL_NAME
+from text_prep import text_preprocessor
+from config import GEMINI_API_KEY, GEMINI_MODEL_NAME, MAX_PERSONAS, MIN_COMMENTS_FOR_PERSONA, PROMPT_TEXT_TOKENS
 
 # Configure Gemini
 genai.configure(api_key=GEMINI_API_KEY)
@@ -68,33 +70,39 @@ Comments:
     return None
 
 
-def create_personas_from_data(data):
+def get_author_comments(
+    comment: Dict[str, Any],
+    author_history_loader: Optional[Callable[[Dict[str, Any]], List[Dict[str, Any]]]] = None,
+) -> List[Dict[str, Any]]:
     """
-    Build personas from collected Reddit data.
-    One persona per unique author (if enough comments).
+    Return a comment's author history, asking the loader for it if the
+    collector left it unhydrated.
+    """
+    if "author_hot_comments" not in comment and author_history_loader:
+        return author_history_loader(comment)
+    return comment.get("author_hot_comments", [])
+
+
+def iter_personas(posts, author_history_loader=None):
+    """
+    Yield personas one at a time while walking posts and their comments.
+    `posts` can be a list or a generator (e.g. from iter_collect_data), so
+    persona generation starts as soon as the first eligible author arrives
+    and stops pulling posts as soon as the caller stops iterating.
     """
-    all_personas = []
     persona_counter = 1
 
-    # Count total eligible authors for time estimation
-    eligible_authors = []
-    for post in data:
+    for post in posts:
         for comment in post.get("top_level_comments", []):
-            author_comments = comment.get("author_hot_comments", [])
-            if len(author_comments) >= 5:
-                eligible_authors.append(comment['author'])
-    
-    print(f"Found {len(eligible_authors)} eligible authors for persona generation")
-    print("Estimated time: {:.1f} minutes (due to API rate limits)".format(len(eligible_authors) * 4.5 / 60))
+            if comment.get("author") == "[deleted]":
+                continue
 
-    for post in data:
-        for comment in post.get("top_level_comments", []):
-            author_comments = comment.get("author_hot_comments", [])
+            author_comments = get_author_comments(comment, author_history_loader)
 
-            if len(author_comments) >= 5:  # require enough comments to build persona
+            if len(author_comments) >= MIN_COMMENTS_FOR_PERSONA:  # require enough comments to build persona
                 # OPTIMIZE: Limit comment data to reduce tokens
                 top_comments = sorted(author_comments, key=lambda x: x.get('score', 0), reverse=True)[:3]  # Only top 3 comments
-                comments_text = "\n".join([f"- {c['body'][:200]}..." if len(c['body']) > 200 else f"- {c['body']}" for c in top_comments])  # Truncate each comment
+                comments_text = "\n".join([f"- {text_preprocessor.prepare(c['body'], PROMPT_TEXT_TOKENS, ellipsis='...')}" for c in top_comments])  # Clean and truncate each comment
 
                 print(f"Generating persona {persona_counter} for author '{comment['author']}'...")
                 persona = generate_persona(comments_text)
@@ -104,16 +112,75 @@ def create_personas_from_data(data):
                     persona["author"] = comment["author"]  # ✅ include author here
                     persona["generated_from_comments"] = comments_text
 
-                    all_personas.append(persona)
                     print(f"   ✅ Created persona_{persona_counter}")
                     persona_counter += 1
+                    yield persona
                 else:
                     print(f"   ❌ Skipping persona for '{comment['author']}' (failed to generate)")
 
-                if len(all_personas) >= 5:
-                    break
-        if len(all_personas) >= 5:
+
+def create_personas_from_data(data, author_history_loader=None):
+    """
+    Build personas from collected Reddit data.
+    One persona per unique author (if enough comments).
+
+    If comments come without author histories (lazy collection), pass
+    `author_history_loader` and histories are only fetched for the authors
+    considered before MAX_PERSONAS personas exist.
+    """
+    all_personas = []
+
+    lazy = any(
+        "author_hot_comments" not in comment
+        for post in data
+        for comment in post.get("top_level_comments", [])
+    )
+
+    if lazy and author_history_loader:
+        # Counting eligible authors up front would hydrate every history
+        print(f"Author histories are loaded on demand (up to {MAX_PERSONAS} personas)")
+        print("Estimated time: {:.1f} minutes (due to API rate limits)".format(MAX_PERSONAS * 4.5 / 60))
+    else:
+        # Count total eligible authors for time estimation
+        eligible_authors = []
+        for post in data:
+            for comment in post.get("top_level_comments", []):
+                author_comments = comment.get("author_hot_comments", [])
+                if len(author_comments) >= MIN_COMMENTS_FOR_PERSONA:
+                    eligible_authors.append(comment['author'])
+
+        print(f"Found {len(eligible_authors)} eligible authors for persona generation")
+        print("Estimated time: {:.1f} minutes (due to API rate limits)".format(len(eligible_authors) * 4.5 / 60))
+
+    for persona in iter_personas(data, author_history_loader):
+        all_personas.append(persona)
+        if len(all_personas) >= MAX_PERSONAS:
             break
 
     print(f"\nGenerated {len(all_personas)} personas total")
-    return all_personas
\ No newline at end of file
+    return all_personas
+
+
+def create_personas_from_stream(posts, author_history_loader=None):
+    """
+    Build up to MAX_PERSONAS personas from a stream of posts, closing the
+    stream (and so stopping Reddit collection) once enough personas exist.
+    """
+    all_personas = []
+    start_time = time.time()
+    persona_stream = iter_personas(posts, author_history_loader)
+
+    try:
+        for persona in persona_stream:
+            all_personas.append(persona)
+            if len(all_personas) == 1:
+                print(f"Time to first persona: {time.time() - start_time:.2f} seconds")
+            if len(all_personas) >= MAX_PERSONAS:
+                break
+    finally:
+        persona_stream.close()
+        if hasattr(posts, "close"):
+            posts.close()
+
+    print(f"\nGenerated {len(all_personas)} personas total in {time.time() - start_time:.2f} seconds")
+    return all_personas
@@ -0,0 +1,112 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+# Lower runs first: listings gate everything else, author histories are only needed last
+PRIORITIES = {"listing": 0, "info": 1, "comments": 2, "author": 3}
+
+
+class RequestScheduler:
+    """Single gate for every Reddit request, shared by all threads.
+
+    Callers queue by priority class and are released one at a time, spaced
+    so the remaining budget lasts until the window resets. Until Reddit has
+    reported its rate-limit headers the spacing falls back to
+    ``requests_per_minute``. Once the headers are known the pace follows
+    ``remaining / seconds to reset``, so the whole budget is used, and when
+    only ``reserve`` requests are left everything waits for the reset.
+    """
+
+    def __init__(self, requests_per_minute: float, reserve: int = 2):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self.reserve = reserve
+        self.calls = 0
+        self.calls_by_kind: Counter = Counter()
+        self.throttled = 0
+        self.remaining: Optional[float] = None
+        self.used: Optional[int] = None
+        self._reset_at: Optional[float] = None
+        self._next_slot = 0.0
+        self._queue: list = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+
+    def _spacing(self, now: float) -> float:
+        """Seconds between requests for the current budget (lock held)"""
+        if self.remaining is None or self._reset_at is None or now >= self._reset_at:
+            return self.interval
+        return (self._reset_at - now) / max(self.remaining - self.reserve, 1)
+
+    def _wait_seconds(self, now: float) -> float:
+        """How long the head of the queue must still wait (lock held)"""
+        if self.remaining is not None and self._reset_at is not None and now < self._reset_at:
+            if self.remaining <= self.reserve:
+                return self._reset_at - now
+        return self._next_slot - now
+
+    def acquire(self, kind: str = "listing", count: int = 1) -> None:
+        """Block until this caller's turn, then account for ``count`` requests of class ``kind``"""
+        ticket = (PRIORITIES.get(kind, len(PRIORITIES)), next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            self._cond.notify_all()
+
+            while True:
+                if self._queue[0] == ticket:
+                    now = time.monotonic()
+                    wait = self._wait_seconds(now)
+                    if wait <= 0:
+                        break
+                    self._cond.wait(timeout=wait)
+                else:
+                    self._cond.wait()
+
+            heapq.heappop(self._queue)
+            self._next_slot = now + self._spacing(now) * count
+            self.calls += count
+            self.calls_by_kind[kind] += count
+            if self.remaining is not None:
+                self.remaining -= count
+            self._cond.notify_all()
+
+    def update(self, limits: Optional[Dict[str, Any]]) -> None:
+        """Record the budget Reddit reported (``remaining``, ``reset_seconds``, ``used``)"""
+        if not limits or limits.get("remaining") is None:
+            return
+
+        with self._cond:
+            self.remaining = float(limits["remaining"])
+            self.used = limits.get("used")
+            self._reset_at = time.monotonic() + max(float(limits.get("reset_seconds") or 0), 0.0)
+            self._cond.notify_all()
+
+    def throttle(self, retry_after: float) -> None:
+        """Reddit refused a request: hold everything for ``retry_after`` seconds"""
+        with self._cond:
+            self.throttled += 1
+            self.remaining = 0
+            self._reset_at = max(self._reset_at or 0.0, time.monotonic() + retry_after)
+            self._cond.notify_all()
+
+    def status(self) -> Dict[str, Any]:
+        """Current budget, pace and queue depth"""
+        with self._cond:
+            now = time.monotonic()
+            queued = Counter(
+                next((kind for kind, priority in PRIORITIES.items() if priority == ticket[0]), "other")
+                for ticket in self._queue
+            )
+            return {
+                "calls": self.calls,
+                "calls_by_kind": dict(self.calls_by_kind),
+                "queue_depth": len(self._queue),
+                "queued_by_kind": dict(queued),
+                "remaining": self.remaining,
+                "used": self.used,
+                "reset_in_seconds": max(self._reset_at - now, 0.0) if self._reset_at else None,
+                "seconds_per_request": self._spacing(now),
+                "throttled": self.throttled,
+            }
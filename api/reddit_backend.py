@@ -0,0 +1,434 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import praw
+import prawcore
+
+
+class RateLimited(RuntimeError):
+    """Reddit refused a request for exceeding the rate limit"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limited by Reddit, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class RedditBackend:
+    """Everything the collector reads from Reddit, returned as plain dicts.
+
+    Posts look like ``{"title", "content", "url", "score", "flair", "nsfw",
+    "id", "created_utc"}``, comments like ``{"score", "body", "author",
+    "stickied", "distinguished"}``.
+    Author histories are ``{"status", "comments"}`` where status is "ok",
+    "deleted" or "suspended". Any other failure is raised to the caller;
+    being throttled is raised as ``RateLimited``.
+
+    ``fetch_stats`` counts comment requests and the objects/bytes they
+    returned, so the cost of comment-tree fetching can be reported.
+    """
+
+    def __init__(self):
+        self._fetch_stats: Counter = Counter()
+        # Comment trees are fetched from several threads at once
+        self._stats_lock = threading.Lock()
+
+    @property
+    def fetch_stats(self) -> Counter:
+        """A copy of the comment fetch counters"""
+        with self._stats_lock:
+            return self._fetch_stats.copy()
+
+    def _count_fetch(self, **counts: int) -> None:
+        with self._stats_lock:
+            self._fetch_stats.update(counts)
+
+    def check_connection(self) -> bool:
+        """Raise if the backend can't be reached, else return True"""
+        raise NotImplementedError
+
+    def rate_limits(self) -> Optional[Dict[str, Any]]:
+        """Budget reported with the last response (``remaining``, ``reset_seconds``, ``used``), if any"""
+        return None
+
+    def iter_posts(
+        self,
+        subreddit_name: str,
+        sort: str = "hot",
+        limit: int = 100,
+        query: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield posts from a subreddit listing, or from a search if ``query`` is set"""
+        raise NotImplementedError
+
+    def top_level_comments(self, post_id: str, limit: int = 10, shallow: bool = False) -> List[Dict[str, Any]]:
+        """Top-sorted top-level comments of a post, skipping MoreComments.
+
+        With ``shallow`` only depth-1, limited comments are requested and
+        MoreComments are never expanded, instead of building the whole forest.
+        """
+        raise NotImplementedError
+
+    def author_comments(self, author_name: str, limit: int = 10) -> Dict[str, Any]:
+        """An author's hot comments with the account status"""
+        raise NotImplementedError
+
+    def info(self, fullnames: List[str]) -> List[Dict[str, Any]]:
+        """Current metadata for up to 100 posts (t3_) and comments (t1_) in one request.
+
+        Things that no longer exist are left out; comments come back as
+        ``{"id", "score", "body", "author"}``.
+        """
+        raise NotImplementedError
+
+
+class PrawBackend(RedditBackend):
+    """Live Reddit through praw.
+
+    praw clients aren't thread-safe, so each thread gets its own, created on
+    first use rather than at import. Every new client fetches its own OAuth
+    token outside the request scheduler, so callers should make their calls
+    from long-lived threads.
+    """
+
+    RATE_LIMIT_WINDOW = 600.0
+
+    def __init__(self, client_id: str, client_secret: str, user_agent: str):
+        super().__init__()
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.user_agent = user_agent
+        self._thread_local = threading.local()
+
+    @property
+    def reddit(self) -> praw.Reddit:
+        """The praw client for the current thread"""
+        client = getattr(self._thread_local, "reddit", None)
+        if client is None:
+            client = praw.Reddit(
+                client_id=self.client_id,
+                client_secret=self.client_secret,
+                user_agent=self.user_agent,
+            )
+            self._thread_local.reddit = client
+        return client
+
+    @contextmanager
+    def _rate_limit_errors(self) -> Iterator[None]:
+        """Raise praw's 429 as ``RateLimited``, waiting as long as Reddit asked"""
+        try:
+            yield
+        except prawcore.exceptions.TooManyRequests as e:
+            retry_after = e.retry_after
+            if retry_after is None:
+                reset = self.reddit.auth.limits.get("reset_timestamp")
+                retry_after = reset - time.time() if reset else 60.0
+            raise RateLimited(max(float(retry_after), 1.0)) from e
+
+    def rate_limits(self):
+        # praw keeps X-Ratelimit-* of the last response per client, so read this thread's
+        client = getattr(self._thread_local, "reddit", None)
+        limits = client.auth.limits if client is not None else {}
+        if limits.get("remaining") is None:
+            return None
+
+        reset = limits.get("reset_timestamp")
+        if reset is not None:
+            reset_seconds = reset - time.time()
+        else:
+            # Newer praw dropped reset_timestamp; Reddit's windows are fixed 10-minute periods
+            reset_seconds = self.RATE_LIMIT_WINDOW - time.time() % self.RATE_LIMIT_WINDOW
+        return {
+            "remaining": limits["remaining"],
+            "reset_seconds": max(reset_seconds, 0.0),
+            "used": limits.get("used"),
+        }
+
+    @staticmethod
+    def submission_to_post(submission) -> Dict[str, Any]:
+        """Convert a praw submission into the post dict used throughout the collector"""
+        return {
+            "title": submission.title,
+            "content": submission.selftext if submission.selftext else submission.title,
+            "url": submission.url,
+            "score": submission.score,
+            "flair": submission.link_flair_text,
+            "nsfw": submission.over_18,
+            "id": submission.id,
+            "created_utc": submission.created_utc,
+        }
+
+    def check_connection(self) -> bool:
+        with self._rate_limit_errors():
+            subreddit = self.reddit.subreddit("python")
+            # Fetching a basic property forces a request, which tests the connection
+            _ = subreddit.subscribers
+        return True
+
+    def iter_posts(self, subreddit_name, sort="hot", limit=100, query=None):
+        subreddit = self.reddit.subreddit(subreddit_name)
+
+        if query:
+            listing = subreddit.search(query, sort=sort, limit=limit)
+        elif sort == "new":
+            listing = subreddit.new(limit=limit)
+        else:
+            listing = subreddit.hot(limit=limit)
+
+        with self._rate_limit_errors():
+            for submission in listing:
+                yield self.submission_to_post(submission)
+
+    def top_level_comments(self, post_id, limit=10, shallow=False):
+        with self._rate_limit_errors():
+            if shallow:
+                return self._shallow_top_level_comments(post_id, limit)
+            return self._full_top_level_comments(post_id, limit)
+
+    def _full_top_level_comments(self, post_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Walk praw's comment forest for the top-level comments"""
+        submission = self.reddit.submission(id=post_id)
+        submission.comment_sort = 'top'
+        self._count_fetch(comment_requests=1, comment_objects=len(submission.comments.list()))
+
+        comments = []
+        for comment in submission.comments:
+            if len(comments) >= limit:
+                break
+
+            if not isinstance(comment, praw.models.MoreComments) and comment.body:
+                comments.append({
+                    "score": comment.score,
+                    "body": comment.body,
+                    "author": comment.author.name if comment.author else "[deleted]",
+                    "stickied": bool(comment.stickied),
+                    "distinguished": comment.distinguished,
+                })
+
+        return comments
+
+    def _shallow_top_level_comments(self, post_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Fetch only depth-1 top comments as raw JSON, skipping praw's forest building"""
+        response = self.reddit.request(
+            method="GET",
+            path=f"comments/{post_id}",
+            # Ask for a few extra in case some top comments have empty bodies
+            params={"sort": "top", "depth": 1, "limit": min(limit * 2, 500), "raw_json": 1},
+        )
+        children = response[1]["data"]["children"] if len(response) > 1 else []
+
+        self._count_fetch(comment_requests=1, comment_bytes=len(json.dumps(response)), comment_objects=len(children))
+
+        comments = []
+        for child in children:
+            if len(comments) >= limit:
+                break
+
+            data = child.get("data", {})
+            if child.get("kind") == "t1" and data.get("body"):
+                comments.append({
+                    "score": data.get("score", 0),
+                    "body": data["body"],
+                    "author": data.get("author") or "[deleted]",
+                    "stickied": bool(data.get("stickied")),
+                    "distinguished": data.get("distinguished"),
+                })
+
+        return comments
+
+    def author_comments(self, author_name, limit=10):
+        author_comments = []
+        try:
+            with self._rate_limit_errors():
+                for auth_comment in self.reddit.redditor(author_name).comments.hot(limit=limit):
+                    if (not isinstance(auth_comment, praw.models.MoreComments) and
+                        auth_comment.body and len(author_comments) < limit):
+                        author_comments.append({
+                            "score": auth_comment.score,
+                            "body": auth_comment.body
+                        })
+        except prawcore.exceptions.NotFound:
+            return {"status": "deleted", "comments": []}
+        except prawcore.exceptions.Forbidden:
+            return {"status": "suspended", "comments": []}
+
+        return {"status": "ok", "comments": author_comments}
+
+    def info(self, fullnames):
+        with self._rate_limit_errors():
+            return self._info(fullnames)
+
+    def _info(self, fullnames: List[str]) -> List[Dict[str, Any]]:
+        things = []
+        for thing in self.reddit.info(fullnames=list(fullnames)):
+            if isinstance(thing, praw.models.Submission):
+                things.append(self.submission_to_post(thing))
+            elif isinstance(thing, praw.models.Comment):
+                things.append({
+                    "id": thing.id,
+                    "score": thing.score,
+                    "body": thing.body,
+                    "author": thing.author.name if thing.author else "[deleted]",
+                })
+        return things
+
+
+class FixtureError(RuntimeError):
+    """Error injected by FixtureBackend"""
+
+
+class FixtureBackend(RedditBackend):
+    """Offline stand-in that serves Reddit data from files shaped like reddit_data.json.
+
+    Each file is a list of posts with ``top_level_comments``, each comment
+    carrying ``author_hot_comments``. Every call sleeps ``latency_seconds``
+    (listings once per 100-post page) and fails with ``FixtureError`` at
+    ``error_rate``, so collector throughput can be measured reproducibly
+    without network access. ``calls`` counts calls per method.
+
+    With ``rate_limit`` set, the fixture also enforces and reports a budget
+    of that many calls per ``window_seconds``, like Reddit's rate-limit
+    headers, raising ``RateLimited`` once it is spent.
+    """
+
+    PAGE_SIZE = 100
+    FLAIR_QUERY = re.compile(r'flair_name:"((?:[^"\\]|\\.)*)"')
+
+    def __init__(
+        self,
+        paths: List[str],
+        subreddit_name: Optional[str] = None,
+        latency_seconds: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+        rate_limit: int = 0,
+        window_seconds: float = 600.0,
+    ):
+        super().__init__()
+        self.subreddit_name = subreddit_name
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.window_seconds = window_seconds
+        self._window_start = time.time()
+        self._window_calls = 0
+        self.calls: Counter = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.posts: List[Dict[str, Any]] = []
+        self.comments: Dict[str, List[Dict[str, Any]]] = {}
+        self.authors: Dict[str, List[Dict[str, Any]]] = {}
+
+        for path in paths:
+            with open(path) as f:
+                for post in json.load(f):
+                    self._add_post(post)
+
+        print(f"Fixture backend loaded {len(self.posts)} posts and {len(self.authors)} authors")
+
+    def _add_post(self, post: Dict[str, Any]) -> None:
+        post = dict(post)
+        comments = post.pop("top_level_comments", [])
+        post.pop("similarity_score", None)
+        post.setdefault("flair", None)
+        post.setdefault("nsfw", False)
+        post.setdefault("created_utc", float(len(self.posts)))
+        self.posts.append(post)
+
+        self.comments[post["id"]] = []
+        for comment in comments:
+            self.comments[post["id"]].append({
+                "score": comment.get("score", 0),
+                "body": comment.get("body", ""),
+                "author": comment.get("author", "[deleted]"),
+                "stickied": bool(comment.get("stickied")),
+                "distinguished": comment.get("distinguished"),
+            })
+            history = self.authors.setdefault(comment.get("author", "[deleted]"), [])
+            for auth_comment in comment.get("author_hot_comments", []):
+                if auth_comment not in history:
+                    history.append(auth_comment)
+
+    def _call(self, method: str) -> None:
+        with self._lock:
+            self.calls[method] += 1
+            if self.rate_limit:
+                now = time.time()
+                if now - self._window_start >= self.window_seconds:
+                    self._window_start = now
+                    self._window_calls = 0
+                if self._window_calls >= self.rate_limit:
+                    raise RateLimited(self._window_start + self.window_seconds - now)
+                self._window_calls += 1
+            fail = self._random.random() < self.error_rate
+
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        if fail:
+            raise FixtureError(f"Injected error in {method}")
+
+    def rate_limits(self):
+        if not self.rate_limit:
+            return None
+        with self._lock:
+            return {
+                "remaining": self.rate_limit - self._window_calls,
+                "reset_seconds": self._window_start + self.window_seconds - time.time(),
+                "used": self._window_calls,
+            }
+
+    def check_connection(self):
+        self._call("check_connection")
+        return True
+
+    def iter_posts(self, subreddit_name, sort="hot", limit=100, query=None):
+        posts = self.posts
+        if self.subreddit_name and subreddit_name.lower() != self.subreddit_name.lower():
+            posts = []
+
+        if query:
+            match = self.FLAIR_QUERY.search(query)
+            if match:
+                flair = match.group(1).replace('\\"', '"')
+                posts = [post for post in posts if post["flair"] == flair]
+
+        if sort == "new":
+            posts = sorted(posts, key=lambda post: post["created_utc"], reverse=True)
+        else:
+            posts = sorted(posts, key=lambda post: post.get("score", 0), reverse=True)
+
+        for i, post in enumerate(posts[:limit]):
+            if i % self.PAGE_SIZE == 0:
+                self._call("listing")
+            yield dict(post)
+
+    def top_level_comments(self, post_id, limit=10, shallow=False):
+        self._call("top_level_comments")
+        comments = self.comments.get(post_id, [])
+
+        # A full fetch transfers every comment; a shallow one only what was asked for
+        served = comments[:limit * 2] if shallow else comments
+        self._count_fetch(comment_requests=1, comment_objects=len(served), comment_bytes=len(json.dumps(served)))
+
+        return [dict(comment) for comment in comments[:limit]]
+
+    def author_comments(self, author_name, limit=10):
+        self._call("author_comments")
+        if author_name not in self.authors:
+            return {"status": "deleted", "comments": []}
+        return {"status": "ok", "comments": [dict(c) for c in self.authors[author_name][:limit]]}
+
+    def info(self, fullnames):
+        self._call("info")
+        posts_by_id = {post["id"]: post for post in self.posts}
+        return [
+            dict(posts_by_id[fullname[3:]])
+            for fullname in fullnames
+            if fullname.startswith("t3_") and fullname[3:] in posts_by_id
+        ]
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+FINGERPRINT_FIELDS = ("title", "content", "subreddit", "submission_flair", "is_nsfw")
+
+
+def submission_fingerprint(submission: Dict[str, Any]) -> str:
+    """Hash of the fields that decide a submission's similar posts.
+
+    Text is lowercased and whitespace-collapsed, so resubmissions that only
+    differ in case or spacing share a fingerprint.
+    """
+    normalized = {}
+    for field in FINGERPRINT_FIELDS:
+        value = submission.get(field)
+        if isinstance(value, str):
+            value = re.sub(r"\s+", " ", value).strip().lower()
+        normalized[field] = value
+    return hashlib.sha1(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SimilarPostsCache:
+    """In-memory LRU of similar-post results.
+
+    Keys combine the submission fingerprint with whatever identifies the
+    candidate set (snapshot version, corpus version, model...), so a result
+    is never served once the candidates it was computed from have changed.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(submission: Dict[str, Any], *candidate_state: Any) -> str:
+        """Cache key for a submission against a given candidate state"""
+        return ":".join([submission_fingerprint(submission), *(str(part) for part in candidate_state)])
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Copies of the cached posts, or None on a miss"""
+        with self._lock:
+            posts = self._entries.get(key)
+            if posts is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(post) for post in posts]
+
+    def put(self, key: str, posts: List[Dict[str, Any]]) -> None:
+        """Store a result, evicting the least recently used past the size bound"""
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = [dict(post) for post in posts]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else None,
+        }
@@ -0,0 +1,56 @@
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+
+def recall_at_k(reference: Sequence, candidate: Sequence) -> float:
+    """Fraction of the reference top-k that also appears in the candidate top-k"""
+    if not reference:
+        return 1.0
+    return len(set(reference) & set(candidate)) / len(reference)
+
+
+def score_matrix(target_embeddings: np.ndarray, candidate_embeddings: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every target against every candidate in one matmul.
+
+    Both sides must already be L2-normalized, so the dot product is the cosine.
+    """
+    return np.atleast_2d(target_embeddings) @ candidate_embeddings.T
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Per-row indices of the ``k`` highest scores, best first.
+
+    ``argpartition`` finds the top k in linear time; only those k are sorted.
+    Works on a single score vector or on a matrix of one row per target.
+    """
+    scores = np.atleast_2d(scores)
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def ranking_parity(reference_scores: np.ndarray, candidate_scores: np.ndarray, k: int) -> Dict[str, Any]:
+    """Compare two sets of similarity scores over the same candidates.
+
+    Reports how much of the reference top-k the candidate scores keep, whether
+    the top-k order is identical, and the largest per-post score difference.
+    """
+    reference_top = np.argsort(-reference_scores, kind="stable")[:k].tolist()
+    candidate_top = np.argsort(-candidate_scores, kind="stable")[:k].tolist()
+    deltas = np.abs(reference_scores - candidate_scores)
+
+    return {
+        "recall_at_k": recall_at_k(reference_top, candidate_top),
+        "same_order": reference_top == candidate_top,
+        "max_score_delta": float(deltas.max()) if deltas.size else 0.0,
+        "mean_score_delta": float(deltas.mean()) if deltas.size else 0.0,
+    }
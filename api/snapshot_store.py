@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from embedding_cache import content_hash
+
+
+class PostSnapshotStore:
+    """Local snapshots of fetched posts per (subreddit, flair, nsfw).
+
+    Each snapshot is a JSON file holding the posts, when the snapshot was
+    last fully and incrementally refreshed, and a ``version`` that is bumped
+    whenever the set of posts or any post's content changes. Callers decide
+    how to refresh; the store only merges and persists.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def snapshot_key(subreddit: str, flair: Optional[str], nsfw: bool) -> str:
+        """Filesystem-safe key for a (subreddit, flair, nsfw) combination"""
+        subreddit = subreddit.replace("r/", "").lower()
+        flair_part = re.sub(r"[^a-z0-9]+", "-", flair.lower()).strip("-") if flair else "any"
+        flair_digest = hashlib.sha1((flair or "").encode("utf-8")).hexdigest()[:8]
+        return f"{subreddit}__{flair_part}-{flair_digest}__{'nsfw' if nsfw else 'sfw'}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def sidecar_path(self, snapshot: Dict[str, Any], suffix: str) -> str:
+        """Path for a file kept alongside a snapshot, e.g. an index built over its posts"""
+        key = self.snapshot_key(snapshot["subreddit"], snapshot["flair"], snapshot["nsfw"])
+        return os.path.join(self.directory, f"{key}.{suffix}")
+
+    def load(self, subreddit: str, flair: Optional[str], nsfw: bool) -> Optional[Dict[str, Any]]:
+        """Return the stored snapshot, or None if there isn't one"""
+        path = self._path(self.snapshot_key(subreddit, flair, nsfw))
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading post snapshot {path}: {e}")
+            return None
+
+    def save(self, snapshot: Dict[str, Any]) -> None:
+        """Persist a snapshot atomically"""
+        key = self.snapshot_key(snapshot["subreddit"], snapshot["flair"], snapshot["nsfw"])
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+
+        with self._lock:
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump(snapshot, f)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                print(f"Error saving post snapshot {path}: {e}")
+
+    @staticmethod
+    def new_snapshot(subreddit: str, flair: Optional[str], nsfw: bool) -> Dict[str, Any]:
+        """Empty snapshot for a (subreddit, flair, nsfw) combination"""
+        return {
+            "subreddit": subreddit.replace("r/", ""),
+            "flair": flair,
+            "nsfw": nsfw,
+            "version": 0,
+            "full_refresh_at": 0.0,
+            "refreshed_at": 0.0,
+            "posts": [],
+        }
+
+    @staticmethod
+    def merge(
+        snapshot: Dict[str, Any],
+        posts: List[Dict[str, Any]],
+        replace: bool = False,
+        max_posts: Optional[int] = None,
+        full_refresh: Optional[bool] = None,
+    ) -> int:
+        """Merge freshly fetched posts into a snapshot and return how many were new or changed.
+
+        With ``replace`` the snapshot keeps only ``posts``. Otherwise existing
+        posts are updated in place and new ones added, keeping the newest
+        ``max_posts`` by creation time. The version is bumped on any change.
+        ``full_refresh`` (default: same as ``replace``) records the merge as a
+        full refresh of the listing.
+        """
+        now = time.time()
+        existing = {} if replace else {post["id"]: post for post in snapshot["posts"]}
+        previous_hashes = {post["id"]: post.get("content_hash") for post in snapshot["posts"]}
+
+        changed = 0
+        for post in posts:
+            post = dict(post)
+            post["content_hash"] = content_hash(post)
+            post["fetched_at"] = now
+            if previous_hashes.get(post["id"]) != post["content_hash"]:
+                changed += 1
+            existing[post["id"]] = post
+
+        merged = list(existing.values())
+        if max_posts and len(merged) > max_posts:
+            merged.sort(key=lambda post: post.get("created_utc", 0), reverse=True)
+            merged = merged[:max_posts]
+
+        removed = set(previous_hashes) - {post["id"] for post in merged}
+        if changed or removed:
+            snapshot["version"] += 1
+
+        snapshot["posts"] = merged
+        snapshot["refreshed_at"] = now
+        if replace if full_refresh is None else full_refresh:
+            snapshot["full_refresh_at"] = now
+        return changed
+
+    @staticmethod
+    def newest_created(snapshot: Dict[str, Any]) -> Optional[float]:
+        """``created_utc`` of the most recently created post in the snapshot"""
+        if not snapshot["posts"]:
+            return None
+        return max(post.get("created_utc", 0) for post in snapshot["posts"])
@@ -0,0 +1,180 @@
+"""Local stores and the sentence encoder, shared by the collector and offline tools.
+
+Nothing here talks to Reddit or Supabase, so scripts like ``dump_ingest``
+can fill the stores without API credentials.
+"""
+import os
+import atexit
+import threading
+import numpy as np
+from typing import Optional, List, Dict, Any
+from model_manager import model_manager
+from encoders import encoder_key, load_sentence_encoder
+from encode_pool import EncodePool
+from embedding_cache import EmbeddingCache, content_hash
+from text_prep import text_preprocessor
+from author_store import AuthorHistoryStore
+from author_filter import AuthorFilter
+from snapshot_store import PostSnapshotStore
+from ann_index import IVFIndex
+from config import (
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_BACKEND,
+    EMBEDDING_ONNX_FILE,
+    ONNX_EXPORT_DIR,
+    ENCODE_POOL_WORKERS,
+    ENCODE_POOL_MIN_BATCH,
+    ENCODE_POOL_SHARD_SIZE,
+    MODEL_IDLE_SECONDS,
+    MODEL_MEMORY_LIMIT_MB,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_STORAGE,
+    EMBEDDING_PCA_DIMS,
+    EMBEDDING_PCA_MIN_FIT,
+    POST_SNAPSHOT_DIR,
+    ANN_INDEX_DIR,
+    ANN_NLIST,
+    ANN_NPROBE,
+    ANN_TRAIN_MIN,
+    MIN_COMMENTS_FOR_PERSONA,
+    AUTHOR_STORE_PATH,
+    AUTHOR_CACHE_TTL_HOURS,
+    AUTHOR_NEGATIVE_TTL_HOURS,
+    AUTHOR_PREFILTER,
+    BOT_LIST_PATH,
+)
+
+REMOVED_CONTENT = ("[removed]", "[deleted]")
+
+# Author histories are shared between posts and runs
+author_store = AuthorHistoryStore(
+    AUTHOR_STORE_PATH,
+    ttl_seconds=AUTHOR_CACHE_TTL_HOURS * 3600,
+    negative_ttl_seconds=AUTHOR_NEGATIVE_TTL_HOURS * 3600,
+    min_comments=MIN_COMMENTS_FOR_PERSONA,
+)
+
+# Bots, stickied and moderator comments are dropped before they cost an author-history request
+author_filter = AuthorFilter.from_file(BOT_LIST_PATH) if AUTHOR_PREFILTER else None
+
+# Fetched posts per (subreddit, flair, nsfw), refreshed incrementally
+snapshot_store = PostSnapshotStore(POST_SNAPSHOT_DIR)
+
+# Every post ever collected, per subreddit, searchable by embedding
+corpus_indexes: Dict[str, IVFIndex] = {}
+corpus_lock = threading.Lock()
+# Only what display and filtering need is stored with each vector; full text comes from /api/info
+CORPUS_FIELDS = ("title", "url", "score", "flair", "nsfw", "id", "created_utc")
+
+# Sentence encoder is loaded once per process and shared across requests
+model_manager.configure(
+    idle_seconds=MODEL_IDLE_SECONDS,
+    memory_limit_mb=MODEL_MEMORY_LIMIT_MB or None,
+)
+EMBEDDING_MODEL_KEY = encoder_key(EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND)
+
+
+def register_encoder(backend: str, heavy: bool = False) -> str:
+    """Register the sentence encoder for a backend with the model manager and return its key"""
+    key = encoder_key(EMBEDDING_MODEL_NAME, backend)
+    if not model_manager.is_registered(key):
+        model_manager.register(
+            key,
+            lambda: load_sentence_encoder(
+                EMBEDDING_MODEL_NAME, backend,
+                onnx_file=EMBEDDING_ONNX_FILE or None,
+                export_dir=ONNX_EXPORT_DIR,
+            ),
+            heavy=heavy,
+        )
+    return key
+
+
+register_encoder(EMBEDDING_BACKEND)
+
+# Large batches are sharded across worker processes that each keep their own copy of the encoder
+encode_pool: Optional[EncodePool] = None
+if ENCODE_POOL_WORKERS > 1:
+    encode_pool = EncodePool(
+        EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND,
+        workers=ENCODE_POOL_WORKERS,
+        shard_size=ENCODE_POOL_SHARD_SIZE,
+        onnx_file=EMBEDDING_ONNX_FILE or None,
+        export_dir=ONNX_EXPORT_DIR,
+    )
+    atexit.register(encode_pool.close)
+
+
+def post_text(post: Dict[str, Any]) -> str:
+    """The text a post is encoded from: title and content, cleaned and cut to the token budget"""
+    return text_preprocessor.prepare(f"{post['title']} {post.get('content') or ''}")
+
+
+# Post vectors depend on the preprocessing as well as the model, so stores of them are tied to both
+EMBEDDING_VECTOR_KEY = "|".join(filter(None, (EMBEDDING_MODEL_KEY, text_preprocessor.signature)))
+
+# Post embeddings persist across runs so unchanged posts are never re-encoded
+embedding_cache = EmbeddingCache(
+    EMBEDDING_CACHE_PATH,
+    model_name=EMBEDDING_VECTOR_KEY,
+    max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+    storage=EMBEDDING_STORAGE,
+    pca_dims=EMBEDDING_PCA_DIMS,
+    pca_min_fit=EMBEDDING_PCA_MIN_FIT,
+)
+
+
+def encode_texts(texts: List[str]) -> np.ndarray:
+    """Normalized embeddings for texts, using the encode pool for large batches"""
+    if encode_pool is not None and len(texts) >= ENCODE_POOL_MIN_BATCH:
+        try:
+            return encode_pool.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        except Exception as e:
+            print(f"Encode pool failed, encoding in-process: {e}")
+
+    return model_manager.encode(EMBEDDING_MODEL_KEY, texts, convert_to_numpy=True, normalize_embeddings=True)
+
+
+def embed_posts(reddit_posts: List[Dict[str, Any]], use_cache: bool = True, verbose: bool = True) -> np.ndarray:
+    """Return normalized embeddings for posts, encoding only those not already cached"""
+    keys = [EmbeddingCache.make_key(post) for post in reddit_posts]
+    cached = embedding_cache.get_many(keys) if use_cache else {}
+
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    if missing:
+        texts = [post_text(reddit_posts[i]) for i in missing]
+        new_embeddings = encode_texts(texts)
+        cached.update({keys[i]: new_embeddings[j] for j, i in enumerate(missing)})
+        if use_cache:
+            embedding_cache.put_many([keys[i] for i in missing], new_embeddings)
+
+    if use_cache and verbose:
+        print(f"Embedding cache: {len(keys) - len(missing)}/{len(keys)} posts cached, "
+              f"{len(missing)} encoded (lifetime hit rate {embedding_cache.hit_rate():.1%})")
+
+    return np.vstack([cached[key] for key in keys]).astype(np.float32)
+
+
+def corpus_index_path(subreddit_name: str) -> str:
+    return os.path.join(ANN_INDEX_DIR, f"{subreddit_name.replace('r/', '').lower()}.npz")
+
+
+def corpus_payload(post: Dict[str, Any]) -> Dict[str, Any]:
+    """What the corpus index stores next to a post's vector"""
+    return dict({field: post.get(field) for field in CORPUS_FIELDS}, content_hash=content_hash(post))
+
+
+def get_corpus_index(subreddit_name: str) -> IVFIndex:
+    """The subreddit's historical corpus index, loaded from disk on first use"""
+    name = subreddit_name.replace("r/", "").lower()
+    with corpus_lock:
+        index = corpus_indexes.get(name)
+        if index is None:
+            # Compactly stored cache entries come back slightly changed, so the storage mode is part of the key
+            index = IVFIndex.load(
+                corpus_index_path(name), nlist=ANN_NLIST, nprobe=ANN_NPROBE, train_min=ANN_TRAIN_MIN,
+                model_name=f"{EMBEDDING_VECTOR_KEY}|{EMBEDDING_STORAGE}",
+            )
+            corpus_indexes[name] = index
+    return index
@@ -0,0 +1,207 @@
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from config import EMBEDDING_MODEL_NAME, EMBEDDING_MAX_TOKENS, TEXT_PREP_CACHE_SIZE, TEXT_PREPROCESSING
+
+# Bump when cleaning changes, so vectors encoded from older text are not reused
+PREPROCESSING_VERSION = 1
+
+CODE_FENCE_RE = re.compile(r"```.*?```", re.DOTALL)
+IMAGE_RE = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+LINK_RE = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+URL_RE = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+SUBREDDIT_LINK_RE = re.compile(r"(?<!\w)/?([ru])/(\w+)")
+TABLE_RULE_RE = re.compile(r"^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$", re.MULTILINE)
+HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s*", re.MULTILINE)
+QUOTE_RE = re.compile(r"^\s*(&gt;|>)+\s?", re.MULTILINE)
+LIST_MARKER_RE = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+", re.MULTILINE)
+HORIZONTAL_RULE_RE = re.compile(r"^\s*(?:[-*_]\s*){3,}$", re.MULTILINE)
+EMPHASIS_RE = re.compile(r"(\*{1,3}|_{2,3}|~~|>!|!<|\^)")
+INLINE_CODE_RE = re.compile(r"`([^`]*)`")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def clean_text(text: str) -> str:
+    """Strip Reddit markdown, URLs and HTML entities and collapse whitespace.
+
+    Link and image labels and inline code are kept, their targets dropped;
+    code blocks and table rules are removed entirely.
+    """
+    if not text:
+        return ""
+
+    text = CODE_FENCE_RE.sub(" ", text)
+    text = IMAGE_RE.sub(r"\1", text)
+    text = LINK_RE.sub(r"\1", text)
+    text = URL_RE.sub(" ", text)
+    text = SUBREDDIT_LINK_RE.sub(r"\1/\2", text)
+    text = TABLE_RULE_RE.sub(" ", text)
+    text = HORIZONTAL_RULE_RE.sub(" ", text)
+    text = HEADING_RE.sub("", text)
+    text = QUOTE_RE.sub("", text)
+    text = LIST_MARKER_RE.sub("", text)
+    text = INLINE_CODE_RE.sub(r"\1", text)
+    text = EMPHASIS_RE.sub("", text)
+    text = text.replace("|", " ")
+    text = html.unescape(text).replace("\u200b", " ")
+    return WHITESPACE_RE.sub(" ", text).strip()
+
+
+@lru_cache(maxsize=4)
+def load_tokenizer(model_name: str) -> Optional[Any]:
+    """The model's Hugging Face tokenizer, loaded once per process; None if it can't be loaded"""
+    try:
+        from transformers import AutoTokenizer
+
+        return AutoTokenizer.from_pretrained(model_name)
+    except Exception as e:
+        print(f"No tokenizer for {model_name} ({e}), approximating token counts from words")
+        return None
+
+
+class TextPreprocessor:
+    """Cleans text and cuts it to a token budget, caching the results.
+
+    ``max_tokens`` is the model's sequence length including special tokens,
+    so cleaned text is never longer than what the encoder would read anyway.
+    Smaller budgets (e.g. for prompts) cut the same cached clean text further.
+    Without a tokenizer the budget is approximated from word counts.
+    """
+
+    def __init__(
+        self,
+        tokenizer_name: Optional[str],
+        max_tokens: int = 256,
+        cache_size: int = 50000,
+        enabled: bool = True,
+    ):
+        self.tokenizer_name = tokenizer_name
+        self.max_tokens = max_tokens
+        self.cache_size = cache_size
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.truncated = 0
+        self.chars_in = 0
+        self.chars_out = 0
+        self._cleaned: "OrderedDict[str, str]" = OrderedDict()
+        self._prepared: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def signature(self) -> str:
+        """Identifies what the encoder is fed, for tying caches to it ("" when disabled)"""
+        return f"prep{PREPROCESSING_VERSION}-{self.max_tokens}" if self.enabled else ""
+
+    @property
+    def tokenizer(self) -> Optional[Any]:
+        return load_tokenizer(self.tokenizer_name) if self.tokenizer_name else None
+
+    def _remember(self, cache: OrderedDict, key: Any, value: str) -> None:
+        """Insert into an LRU cache, evicting past ``cache_size`` (lock held)"""
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def clean(self, text: str) -> str:
+        """``clean_text`` with results cached by content hash"""
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            cleaned = self._cleaned.get(key)
+            if cleaned is not None:
+                self._cleaned.move_to_end(key)
+                return cleaned
+
+        cleaned = clean_text(text)
+        with self._lock:
+            self._remember(self._cleaned, key, cleaned)
+        return cleaned
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most ``max_tokens`` tokens (special tokens included)"""
+        tokenizer = self.tokenizer
+        if tokenizer is None:
+            # Word pieces outnumber words, so keep roughly three words per four tokens
+            words = text.split()
+            budget = max(int(max_tokens * 0.75), 1)
+            return text if len(words) <= budget else " ".join(words[:budget])
+
+        budget = max(max_tokens - tokenizer.num_special_tokens_to_add(), 1)
+        # Tokens are rarely longer than 10 characters, so never tokenize far past the budget
+        head = text[:budget * 10]
+        if getattr(tokenizer, "is_fast", False):
+            encoding = tokenizer(
+                head, add_special_tokens=False, truncation=True, max_length=budget, return_offsets_mapping=True
+            )
+            offsets = encoding["offset_mapping"]
+            if not offsets or (len(offsets) < budget and len(head) == len(text)):
+                return text
+            return text[:offsets[-1][1]].rstrip()
+
+        tokens = tokenizer.tokenize(head)
+        if len(tokens) <= budget and len(head) == len(text):
+            return text
+        return tokenizer.convert_tokens_to_string(tokens[:budget]).strip()
+
+    def prepare(self, text: str, max_tokens: Optional[int] = None, ellipsis: str = "") -> str:
+        """Clean text and cut it to ``max_tokens`` (the encoder budget by default).
+
+        ``ellipsis`` is appended when something was cut off. When disabled,
+        encoder text passes through untouched and explicit budgets are
+        applied to the raw text.
+        """
+        text = text or ""
+        if not self.enabled and max_tokens is None:
+            return text
+
+        max_tokens = max_tokens or self.max_tokens
+        cleaned = self.clean(text) if self.enabled else text
+        key = (hashlib.sha1(cleaned.encode("utf-8")).hexdigest(), max_tokens)
+        with self._lock:
+            prepared = self._prepared.get(key)
+            if prepared is not None:
+                self._prepared.move_to_end(key)
+                self.hits += 1
+        if prepared is None:
+            prepared = self.truncate(cleaned, max_tokens)
+            with self._lock:
+                self.misses += 1
+                self.chars_in += len(text)
+                self.chars_out += len(prepared)
+                if len(prepared) < len(cleaned):
+                    self.truncated += 1
+                self._remember(self._prepared, key, prepared)
+
+        return prepared + ellipsis if ellipsis and len(prepared) < len(cleaned) else prepared
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hit/miss counters and how much text preprocessing removed"""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "max_tokens": self.max_tokens,
+            "tokenizer": self.tokenizer_name,
+            "entries": len(self._prepared),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else None,
+            "truncated": self.truncated,
+            "chars_in": self.chars_in,
+            "chars_out": self.chars_out,
+        }
+
+
+# Post text is stripped of markdown and URLs and cut to the encoder's token budget once,
+# then reused by the encoder and the LLM prompts
+text_preprocessor = TextPreprocessor(
+    EMBEDDING_MODEL_NAME,
+    max_tokens=EMBEDDING_MAX_TOKENS,
+    cache_size=TEXT_PREP_CACHE_SIZE,
+    enabled=TEXT_PREPROCESSING,
+)
@@ -0,0 +1,248 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def text_key(text: str) -> str:
+    """Cache key for a text's token embeddings"""
+    return hashlib.sha1(text.strip().encode("utf-8")).hexdigest()[:16]
+
+
+class TokenCache:
+    """LRU cache of per-text token embeddings, bounded by the total number of token rows.
+
+    Entry sizes vary with text length and model width (a 200-token post is
+    about 400 KB with deberta-xlarge), so the budget is in tokens rather
+    than entries. It is kept apart from the model so it survives the model
+    being released, and is meant to be saved once, at process exit.
+    """
+
+    def __init__(self, model_name: str, path: Optional[str] = None, max_tokens: int = 100000):
+        self.model_name = model_name
+        self.path = path
+        self.max_tokens = max_tokens
+        self.tokens = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with np.load(self.path) as data:
+                if str(data["model_name"]) != self.model_name:
+                    print("BERTScore token cache was built with a different model, starting fresh")
+                    return
+                # Token matrices have different lengths, so they are stored concatenated
+                tokens = np.split(data["tokens"], data["offsets"][1:-1])
+                self.put_many(dict(zip((str(key) for key in data["keys"]), tokens)))
+                self._dirty = False
+            print(f"Loaded {len(self._entries)} cached BERTScore token embeddings from {self.path}")
+        except Exception as e:
+            print(f"Error loading BERTScore token cache: {e}")
+            self._entries.clear()
+            self.tokens = 0
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Cached token matrices for the keys that have one, counting hits and misses"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                matrix = self._entries.get(key)
+                if matrix is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = matrix
+                self.hits += 1
+        return found
+
+    def put_many(self, matrices: Dict[str, np.ndarray]) -> None:
+        """Add token matrices, evicting the least recently used past ``max_tokens``"""
+        with self._lock:
+            for key, matrix in matrices.items():
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self.tokens -= len(old)
+                self._entries[key] = matrix
+                self.tokens += len(matrix)
+            while self.tokens > self.max_tokens and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.tokens -= len(evicted)
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache to disk if it changed since the last save"""
+        if not self.path:
+            return
+
+        with self._lock:
+            if not self._dirty or not self._entries:
+                return
+            keys = np.array(list(self._entries.keys()), dtype=str)
+            matrices = list(self._entries.values())
+            self._dirty = False
+
+        offsets = np.concatenate([[0], np.cumsum([len(matrix) for matrix in matrices])])
+        tmp_path = f"{self.path}.tmp.npz"
+        try:
+            np.savez(
+                tmp_path,
+                model_name=np.array(self.model_name),
+                keys=keys,
+                offsets=offsets,
+                tokens=np.vstack(matrices),
+            )
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving BERTScore token cache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "tokens": self.tokens,
+            "max_tokens": self.max_tokens,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else None,
+        }
+
+
+class BERTScoreEngine:
+    """BERTScore against one reference, reusing encoded texts.
+
+    Produces the same P/R/F1 as ``bert_score.BERTScorer.score`` without idf
+    or baseline rescaling. The difference is how the work is done: the
+    reference is encoded once per call instead of once per candidate, the
+    token embeddings of candidates are cached by text in a ``TokenCache``,
+    and the greedy matching runs as batched numpy over padded candidate
+    matrices.
+
+    ``model`` and ``tokenizer`` are the (layer-truncated) transformer and
+    tokenizer of a ``BERTScorer``; see ``from_scorer``.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        tokenizer: Any,
+        model_name: str,
+        cache: Optional[TokenCache] = None,
+        batch_size: int = 16,
+        device: str = "cpu",
+    ):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.model_name = model_name
+        self.cache = cache
+        self.batch_size = batch_size
+        self.device = device
+
+    @classmethod
+    def from_scorer(cls, scorer: Any, model_name: str, **kwargs) -> "BERTScoreEngine":
+        """Build an engine that shares the model already loaded by a BERTScorer"""
+        return cls(scorer._model, scorer._tokenizer, model_name, device=scorer.device, **kwargs)
+
+    def _encode_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Normalized per-token embeddings (special tokens included) for a batch of texts"""
+        import torch
+
+        encoded = self.tokenizer(
+            [text.strip() for text in texts],
+            padding=True,
+            truncation=True,
+            max_length=self.tokenizer.model_max_length,
+            return_tensors="pt",
+        )
+        encoded = {name: tensor.to(self.device) for name, tensor in encoded.items()}
+
+        with torch.no_grad():
+            hidden = self.model(encoded["input_ids"], attention_mask=encoded["attention_mask"])[0]
+        hidden = hidden / hidden.norm(dim=-1, keepdim=True)
+
+        hidden = hidden.cpu().numpy()
+        lengths = encoded["attention_mask"].sum(dim=1).tolist()
+        return [hidden[i, :length].astype(np.float16) for i, length in enumerate(lengths)]
+
+    def token_embeddings(self, texts: List[str], use_cache: bool = True) -> List[np.ndarray]:
+        """Token embeddings for texts, encoding only those not cached yet"""
+        keys = [text_key(text) for text in texts]
+        use_cache = use_cache and self.cache is not None
+        found = self.cache.get_many(keys) if use_cache else {}
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        # Encode similar lengths together to keep padding small
+        ordered = sorted(missing.items(), key=lambda item: len(item[1]))
+        for start in range(0, len(ordered), self.batch_size):
+            batch = ordered[start:start + self.batch_size]
+            matrices = self._encode_batch([text for _, text in batch])
+            found.update(zip((key for key, _ in batch), matrices))
+
+        if use_cache and missing:
+            self.cache.put_many({key: found[key] for key in missing})
+
+        return [found[key] for key in keys]
+
+    @staticmethod
+    def greedy_match(
+        reference: np.ndarray, candidates: List[np.ndarray], batch_size: int = 64
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """BERTScore P/R/F1 of each candidate token matrix against one reference.
+
+        Every token has weight 1 except the first and last ([CLS]/[SEP]),
+        which still take part in matching but not in the averages, as in
+        ``bert_score`` without idf.
+        """
+        reference = reference.astype(np.float32)
+        ref_weights = np.ones(len(reference), dtype=np.float32)
+        ref_weights[[0, -1]] = 0
+
+        precision = np.zeros(len(candidates), dtype=np.float32)
+        recall = np.zeros(len(candidates), dtype=np.float32)
+
+        for start in range(0, len(candidates), batch_size):
+            batch = candidates[start:start + batch_size]
+            max_len = max(len(matrix) for matrix in batch)
+
+            padded = np.zeros((len(batch), max_len, reference.shape[1]), dtype=np.float32)
+            weights = np.zeros((len(batch), max_len), dtype=np.float32)
+            valid = np.zeros((len(batch), max_len), dtype=bool)
+            for i, matrix in enumerate(batch):
+                padded[i, :len(matrix)] = matrix
+                weights[i, 1:len(matrix) - 1] = 1
+                valid[i, :len(matrix)] = True
+
+            # (batch, candidate tokens, reference tokens)
+            sim = padded @ reference.T
+            best_for_candidate = sim.max(axis=2)
+            best_for_reference = np.where(valid[:, :, None], sim, -np.inf).max(axis=1)
+
+            end = start + len(batch)
+            precision[start:end] = (best_for_candidate * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+            recall[start:end] = (best_for_reference * ref_weights).sum(axis=1) / max(ref_weights.sum(), 1e-9)
+
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / np.maximum(precision + recall, 1e-9), 0.0)
+        return precision, recall, f1.astype(np.float32)
+
+    def score(
+        self, reference_text: str, candidate_texts: List[str], use_cache: bool = True
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """P/R/F1 of every candidate against a single reference text"""
+        reference = self.token_embeddings([reference_text], use_cache=False)[0]
+        candidates = self.token_embeddings(candidate_texts, use_cache=use_cache)
+        return self.greedy_match(reference, candidates)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters of the token cache"""
+        return self.cache.stats() if self.cache is not None else {}
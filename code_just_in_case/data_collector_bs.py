@@ -1,15 +1,24 @@
 import os
 import json
+import atexit
 import praw
 import numpy as np
 from supabase import create_client, Client
-from bert_score import score
+from bert_score import BERTScorer
+from api.model_manager import model_manager
+from code_just_in_case.bertscore_engine import BERTScoreEngine, TokenCache
+from api.minhash import MinHasher, MinHashLSH, top_k_jaccard
+from api.embedding_cache import EmbeddingCache
 from api.config import (
     REDDIT_CLIENT_ID,
     REDDIT_CLIENT_SECRET,
     REDDIT_USER_AGENT,
     SUPABASE_URL,
     SUPABASE_ANON_KEY,
+    BERTSCORE_CACHE_PATH,
+    BERTSCORE_CACHE_MAX_TOKENS,
+    BERTSCORE_MINHASH_PATH,
+    MODEL_MEMORY_LIMIT_MB,
 )
 
 # Supabase setup
@@ -22,6 +31,40 @@ reddit = praw.Reddit(
     user_agent=REDDIT_USER_AGENT,
 )
 
+BERTSCORE_MODEL_TYPE = "microsoft/deberta-xlarge-mnli"
+
+# The BERTScore model is heavy; it is released after scoring if the process is over its memory budget
+model_manager.configure(memory_limit_mb=MODEL_MEMORY_LIMIT_MB or None)
+
+minhasher = MinHasher()
+
+
+# Token caches outlive the engines, which are released after scoring; they are written once at exit
+token_caches = {}
+
+
+def get_token_cache(model_type):
+    """The token cache for a model, persisted only for the default model"""
+    if model_type not in token_caches:
+        path = BERTSCORE_CACHE_PATH if model_type == BERTSCORE_MODEL_TYPE else None
+        token_caches[model_type] = TokenCache(model_type, path, max_tokens=BERTSCORE_CACHE_MAX_TOKENS)
+        atexit.register(token_caches[model_type].save)
+    return token_caches[model_type]
+
+
+def load_bertscore_engine(model_type, device="cpu"):
+    """Load a BERTScorer's model and wrap it in an engine with a persistent token cache"""
+    scorer = BERTScorer(model_type=model_type, device=device)
+    return BERTScoreEngine.from_scorer(scorer, model_type, cache=get_token_cache(model_type))
+
+
+# deberta-xlarge is large, so it is loaded once and can be released when idle
+model_manager.register(
+    BERTSCORE_MODEL_TYPE,
+    lambda: load_bertscore_engine(BERTSCORE_MODEL_TYPE, device="cpu"),  # Change to "cuda" if you have GPU
+    heavy=True,
+)
+
 
 def get_latest_submission():
     """Get the most recent submission from Supabase"""
@@ -84,7 +127,7 @@ def fetch_reddit_posts(subreddit_name, submission_flair=None, is_nsfw=False, lim
         return []
 
 
-def find_similar_posts_bertscore(target_post, reddit_posts, top_k=10, model_type="microsoft/deberta-xlarge-mnli"):
+def find_similar_posts_bertscore(target_post, reddit_posts, top_k=10, model_type=BERTSCORE_MODEL_TYPE):
     """Find most similar posts using BERTScore"""
     if not reddit_posts:
         return []
@@ -95,24 +138,18 @@ def find_similar_posts_bertscore(target_post, reddit_posts, top_k=10, model_type
     print(f"Computing BERTScore similarities for {len(reddit_texts)} posts...")
     
     try:
-        # Create references list (target_text repeated for each candidate)
-        references = [target_text] * len(reddit_texts)
-        
-        # Calculate BERTScore
-        # P: precision, R: recall, F1: F1-score
-        P, R, F1 = score(
-            cands=reddit_texts,  # candidate texts (Reddit posts)
-            refs=references,     # reference texts (target post repeated)
-            model_type=model_type,
-            verbose=True,
-            device="cpu"  # Change to "cuda" if you have GPU
-        )
-        
-        # Convert to numpy arrays for easier manipulation
-        f1_scores = F1.numpy()
-        precision_scores = P.numpy()
-        recall_scores = R.numpy()
-        
+        if not model_manager.is_registered(model_type):
+            model_manager.register(model_type, lambda: load_bertscore_engine(model_type), heavy=True)
+        engine = model_manager.get(model_type)
+
+        # The target is encoded once; unchanged candidates come from the token cache
+        precision_scores, recall_scores, f1_scores = engine.score(target_text, reddit_texts)
+        print(f"BERTScore token cache: {engine.stats()}")
+        # Nothing else scores with it until the next call, so it counts as idle right away
+        released = model_manager.release_idle(idle_seconds=0)
+        if released:
+            print(f"Released idle models: {', '.join(released)}")
+
         # Get top k based on F1 scores
         top_indices = np.argsort(f1_scores)[::-1][:top_k]
         
@@ -130,28 +167,20 @@ def find_similar_posts_bertscore(target_post, reddit_posts, top_k=10, model_type
         print(f"Error computing BERTScore: {e}")
         print("Falling back to simple text matching...")
         
-        # Fallback to simple keyword matching if BERTScore fails
-        target_words = set(target_text.lower().split())
-        similarities = []
-        
-        for post in reddit_posts:
-            post_text = f"{post['title']} {post['content']}".lower()
-            post_words = set(post_text.split())
-            
-            # Jaccard similarity as fallback
-            intersection = len(target_words & post_words)
-            union = len(target_words | post_words)
-            similarity = intersection / union if union > 0 else 0
-            similarities.append(similarity)
-        
-        top_indices = np.argsort(similarities)[::-1][:top_k]
-        
+        # Fall back to MinHash-estimated word Jaccard if BERTScore fails.
+        # Signatures persist between runs, so only new or edited posts are signed.
+        posts_by_key = {EmbeddingCache.make_key(post): post for post in reddit_posts}
+        jaccard_index = MinHashLSH.load(BERTSCORE_MINHASH_PATH, minhasher.num_perm, bands=64)
+        if jaccard_index.sync({key: f"{post['title']} {post['content']}" for key, post in posts_by_key.items()}, minhasher):
+            jaccard_index.save(BERTSCORE_MINHASH_PATH)
+        ranked = top_k_jaccard(target_text, jaccard_index, top_k, minhasher)
+
         similar_posts = []
-        for idx in top_indices:
-            post = reddit_posts[idx].copy()
-            post["bertscore_f1"] = float(similarities[idx])  # Using Jaccard as fallback
-            post["bertscore_precision"] = float(similarities[idx])
-            post["bertscore_recall"] = float(similarities[idx])
+        for key, similarity in ranked:
+            post = posts_by_key[key].copy()
+            post["bertscore_f1"] = similarity  # Using Jaccard as fallback
+            post["bertscore_precision"] = similarity
+            post["bertscore_recall"] = similarity
             similar_posts.append(post)
         
         return similar_posts